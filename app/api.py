@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool
+
+# Add project root and src to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from engines import Engines
+from telemetry import get_telemetry
+
+# Whole-request deadline in seconds, including time queued for the rate limiter.
+REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "30"))
+
+class RetrieveRequest(BaseModel):
+    query: str
+    n_results: int = Field(3, ge=1, le=20)
+    where: Optional[Dict[str, str]] = None
+
+class AnswerRequest(RetrieveRequest):
+    # Conversation so far, as returned by Conversation.context().
+    history: Optional[str] = None
+
+class RoadmapRequest(BaseModel):
+    skills: List[str] = Field(..., min_length=1)
+    target_role: str
+    regenerate: bool = False
+
+class ParseRequest(BaseModel):
+    text: str
+
+def build_engines():
+    """
+    Builds this worker's engines. The vector store is opened read-only:
+    workers share it and only `ingest_data` writes to it.
+    With API_FAKE_MODELS=1, Gemini is replaced by the local fakes
+    (latencies from FAKE_GENERATE_LATENCY and FAKE_EMBED_LATENCY) for load tests.
+    """
+    if os.getenv("API_FAKE_MODELS", "0") != "1":
+        return Engines(read_only=True)
+    from embedding_engine import EmbeddingEngine
+    from fake_gemini import FakeEmbedder, FakeGenerativeModel
+    embedder = FakeEmbedder(latency=float(os.getenv("FAKE_EMBED_LATENCY", "0.05")))
+    embedding_engine = EmbeddingEngine(
+        backend="gemini",
+        embed_fn=embedder.embed_content,
+        aembed_fn=embedder.embed_content_async,
+        use_cache=False
+    )
+    model = FakeGenerativeModel(latency=float(os.getenv("FAKE_GENERATE_LATENCY", "0.2")))
+    return Engines(model=model, embedding_engine=embedding_engine, read_only=True)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Each worker process builds its own engines and warms them before taking traffic.
+    engines = build_engines()
+    await asyncio.to_thread(engines.warm_up().join)
+    app.state.engines = engines
+    print(f"Worker {os.getpid()} ready.")
+    yield
+
+app = FastAPI(title="CareerPathGPT API", lifespan=lifespan)
+
+async def run_with_timeout(fn, *args, **kwargs):
+    """
+    Runs blocking `fn` in a thread, answering 504 after REQUEST_TIMEOUT.
+    The thread itself cannot be interrupted and finishes in the background.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out after {REQUEST_TIMEOUT}s")
+
+def check_generated(text):
+    # The engines report failures as text starting with "Error".
+    if text.startswith("Error"):
+        raise HTTPException(status_code=502, detail=text)
+    return text
+
+async def stream_with_timeout(chunks):
+    """
+    Streams text chunks from the blocking generator `chunks` under the
+    REQUEST_TIMEOUT deadline. The first chunk is awaited before the
+    response starts, so a slow start is still a 504; a deadline missed
+    mid-stream ends the body with an error line instead.
+    """
+    deadline = time.monotonic() + REQUEST_TIMEOUT
+    iterator = iterate_in_threadpool(chunks)
+
+    async def next_chunk():
+        return await asyncio.wait_for(iterator.__anext__(), max(0.0, deadline - time.monotonic()))
+
+    try:
+        first = await next_chunk()
+    except StopAsyncIteration:
+        first = ""
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out after {REQUEST_TIMEOUT}s")
+
+    async def body():
+        yield first
+        while True:
+            try:
+                yield await next_chunk()
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                yield f"\n\nError: timed out after {REQUEST_TIMEOUT}s"
+                return
+
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8")
+
+def without_raw_text(data):
+    # The client already has the text; don't send it back.
+    return {key: value for key, value in data.items() if key != "raw_text"}
+
+def format_results(results):
+    return [
+        {"id": i, "document": d, "metadata": m, "distance": float(dist)}
+        for i, d, m, dist in zip(results["ids"][0], results["documents"][0],
+                                 results["metadatas"][0], results["distances"][0])
+    ]
+
+@app.get("/health")
+def health(request: Request):
+    engines = request.app.state.engines
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "engines": {e.name: e.loaded for e in (engines.rag, engines.roadmap_engine, engines.matcher)},
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Counters are per worker process: each scrape sees whichever worker took the request.
+    return get_telemetry().prometheus_text()
+
+@app.post("/retrieve")
+async def retrieve(body: RetrieveRequest, request: Request):
+    rag = request.app.state.engines.rag.get()
+    try:
+        results = await asyncio.wait_for(rag.aretrieve(body.query, body.n_results, body.where), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out after {REQUEST_TIMEOUT}s")
+    return {"results": format_results(results)}
+
+@app.post("/answer")
+async def answer(body: AnswerRequest, request: Request):
+    rag = request.app.state.engines.rag.get()
+    try:
+        result = await asyncio.wait_for(
+            rag.aanswer(body.query, body.n_results, body.where, history=body.history), REQUEST_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out after {REQUEST_TIMEOUT}s")
+    return {
+        "answer": check_generated(result["answer"]),
+        "sources": result["results"]["ids"][0],
+        "context_tokens": result["context_tokens"],
+    }
+
+@app.post("/answer/stream")
+async def answer_stream(body: AnswerRequest, request: Request):
+    rag = request.app.state.engines.rag.get()
+    return await stream_with_timeout(rag.answer_stream(body.query, body.n_results, body.where, history=body.history))
+
+@app.post("/roadmap")
+async def roadmap(body: RoadmapRequest, request: Request):
+    engine = request.app.state.engines.roadmap_engine.get()
+    text = await run_with_timeout(engine.generate_roadmap, body.skills, body.target_role, regenerate=body.regenerate)
+    return {"roadmap": check_generated(text)}
+
+@app.post("/roadmap/stream")
+async def roadmap_stream(body: RoadmapRequest, request: Request):
+    engine = request.app.state.engines.roadmap_engine.get()
+    return await stream_with_timeout(
+        engine.generate_roadmap_stream(body.skills, body.target_role, regenerate=body.regenerate)
+    )
+
+@app.post("/parse")
+async def parse(body: ParseRequest, request: Request):
+    from resume_parser import parse_resume
+    data = await run_with_timeout(parse_resume, body.text, model=request.app.state.engines.model)
+    return without_raw_text(data)
+
+@app.post("/parse/pdf")
+async def parse_pdf(request: Request):
+    """
+    Parses a resume sent as the raw PDF request body.
+    """
+    from resume_parser import MAX_PDF_BYTES, analyze_resume
+    pdf_bytes = await request.body()
+    if not pdf_bytes:
+        raise HTTPException(status_code=400, detail="Empty request body; send the PDF bytes.")
+    if len(pdf_bytes) > MAX_PDF_BYTES:
+        raise HTTPException(status_code=413, detail=f"PDF larger than {MAX_PDF_BYTES} bytes.")
+    try:
+        data = await run_with_timeout(analyze_resume, pdf_bytes, model=request.app.state.engines.model)
+    except (ValueError, RuntimeError) as e:
+        # Oversized files raise ValueError; PyMuPDF raises RuntimeError subclasses for unreadable ones.
+        raise HTTPException(status_code=400, detail=f"Could not read the PDF: {e}")
+    return without_raw_text(data)
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve CareerPathGPT over HTTP with several worker processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "2")),
+                        help="Worker processes, each with its own warm engines.")
+    args = parser.parse_args()
+    uvicorn.run("api:app", app_dir=os.path.dirname(os.path.abspath(__file__)),
+                host=args.host, port=args.port, workers=args.workers)
@@ -1,17 +1,19 @@
 import streamlit as st
 import os
 import sys
-import tempfile
+import hashlib
 import json
+import uuid
 
 # Add project root and src to sys.path to allow imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-from src.resume_parser import extract_text_from_pdf, parse_resume
-from src.rag_pipeline import RAGPipeline
-from src.roadmap_engine import RoadmapEngine
-from src.utils import create_pdf
+# Engines and their heavy dependencies (chromadb, Gemini, PyMuPDF, fpdf) load on
+# first use, so the first paint does not wait for them.
+from engines import Engines
+from telemetry import get_telemetry
+from conversation_store import Conversation, ConversationStore, extractive_summary, llm_summarizer
 
 # Page Config
 st.set_page_config(
@@ -109,19 +111,42 @@ st.markdown("""
 # Initialize Engines
 @st.cache_resource
 def load_engines():
-    rag = RAGPipeline()
-    roadmap_engine = RoadmapEngine()
-    return rag, roadmap_engine
+    engines = Engines()
+    if os.getenv("APP_WARMUP", "1") != "0":
+        engines.warm_up()
+    return engines
 
-rag, roadmap_engine = load_engines()
+engines = load_engines()
+
+@st.cache_resource
+def load_conversation_store():
+    return ConversationStore()
+
+def summarize_conversation(summary, messages, max_tokens):
+    # Only called once the window overflows (from the roll thread), so the RAG engine is already loaded.
+    llm = engines.rag.get().llm
+    if llm is None:
+        return extractive_summary(summary, messages, max_tokens)
+    return llm_summarizer(llm)(summary, messages, max_tokens)
+
+# Chat history is kept per session id in the URL, so it survives reloads and restarts.
+session_id = st.query_params.get("session")
+if not session_id:
+    session_id = uuid.uuid4().hex
+    st.query_params["session"] = session_id
+conversation = Conversation(load_conversation_store(), session_id, summarize_fn=summarize_conversation)
 
 # Session State
-if "messages" not in st.session_state:
-    st.session_state.messages = []
 if "resume_data" not in st.session_state:
     st.session_state.resume_data = None
+if "resume_hash" not in st.session_state:
+    st.session_state.resume_hash = None
 if "generated_roadmap" not in st.session_state:
     st.session_state.generated_roadmap = None
+if "roadmap_pdf" not in st.session_state:
+    st.session_state.roadmap_pdf = None  # (roadmap hash, PDF bytes)
+if "career_matches" not in st.session_state:
+    st.session_state.career_matches = None  # (resume hash, matches or None if matching failed)
 
 # Sidebar
 with st.sidebar:
@@ -134,27 +159,27 @@ with st.sidebar:
     uploaded_file = st.file_uploader("Upload PDF", type="pdf")
     
     if uploaded_file is not None:
-        with st.spinner("Analyzing Resume..."):
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
-            
-            try:
-                text = extract_text_from_pdf(tmp_path)
-                data = parse_resume(text)
-                st.session_state.resume_data = data
-                st.success("Analysis Complete!")
-            except Exception as e:
-                st.error(f"Error: {e}")
-            finally:
-                os.remove(tmp_path)
+        pdf_bytes = uploaded_file.getvalue()
+        resume_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        # Reruns with the same file keep the result already in the session.
+        if st.session_state.resume_hash != resume_hash:
+            with st.spinner("Analyzing Resume..."):
+                try:
+                    from resume_parser import analyze_resume
+                    st.session_state.resume_data = analyze_resume(pdf_bytes)
+                    st.session_state.resume_hash = resume_hash
+                except Exception as e:
+                    st.error(f"Error: {e}")
+        if st.session_state.resume_hash == resume_hash:
+            st.success("Analysis Complete!")
     
     st.markdown("---")
     
     def clear_chat():
-        st.session_state.messages = []
+        conversation.clear()
         
     st.button("🗑️ Clear Chat", on_click=clear_chat)
+    show_debug = st.checkbox("🔧 Show debug panel")
 
 # Main Content
 st.markdown('<div class="main-header">🚀 Career Guidance Dashboard</div>', unsafe_allow_html=True)
@@ -176,6 +201,25 @@ with col1:
             st.info(", ".join(data['skills']))
         else:
             st.warning("No skills detected.")
+
+        matcher = engines.matcher.get() if data.get('skills') else None
+        if matcher and matcher.available():
+            st.markdown("**🎯 Recommended Careers:**")
+            # Matching embeds the skills, so run it once per resume, not on every rerun.
+            if not st.session_state.career_matches or st.session_state.career_matches[0] != st.session_state.resume_hash:
+                try:
+                    matches = matcher.match(data['skills'], top_n=3)
+                except Exception as e:
+                    print(f"Career matching failed: {e}")
+                    matches = None
+                st.session_state.career_matches = (st.session_state.resume_hash, matches)
+            matches = st.session_state.career_matches[1]
+            if matches is None:
+                st.caption("Career recommendations are unavailable right now.")
+            for match in matches or []:
+                st.markdown(f"**{match['role']}** ({match['score']:.0%} skill match)")
+                if match['missing_skills']:
+                    st.caption("Skills to learn: " + ", ".join(match['missing_skills']))
             
         # Experience & Education in Expanders to save space
         with st.expander("💼 Experience"):
@@ -191,21 +235,28 @@ with col1:
         st.markdown("---")
         st.subheader("🗺️ Generate Roadmap")
         target_role = st.text_input("Enter Target Role (e.g., Data Scientist)")
+        regenerate = st.checkbox("Regenerate (ignore saved roadmap)")
         
+        roadmap_streamed = False
         if st.button("Generate Roadmap 🚀"):
             if not target_role:
                 st.warning("Please enter a target role.")
             elif not data.get('skills'):
                 st.warning("No skills found in resume.")
             else:
-                with st.spinner("Crafting your roadmap..."):
-                    roadmap = roadmap_engine.generate_roadmap(data['skills'], target_role)
-                    st.session_state.generated_roadmap = roadmap
+                # Render chunks as they arrive; write_stream returns the full text.
+                with st.expander("📍 View Roadmap", expanded=True):
+                    roadmap = st.write_stream(
+                        engines.roadmap_engine.get().generate_roadmap_stream(data['skills'], target_role, regenerate=regenerate)
+                    )
+                st.session_state.generated_roadmap = roadmap
+                roadmap_streamed = True
         
         if st.session_state.generated_roadmap:
             st.success("Roadmap Generated!")
-            with st.expander("📍 View Roadmap", expanded=True):
-                st.markdown(st.session_state.generated_roadmap)
+            if not roadmap_streamed:
+                with st.expander("📍 View Roadmap", expanded=True):
+                    st.markdown(st.session_state.generated_roadmap)
             
             st.download_button(
                 label="📥 Export Roadmap",
@@ -214,44 +265,110 @@ with col1:
                 mime="text/markdown"
             )
             
-            # Safe PDF Export
-            try:
-                pdf_bytes = create_pdf(st.session_state.generated_roadmap)
+            # PDF Export: rendered only on request, then reused while the roadmap is unchanged
+            from utils import create_pdf_cached, roadmap_hash
+            current_hash = roadmap_hash(st.session_state.generated_roadmap)
+            if st.button("📄 Prepare PDF"):
+                try:
+                    with st.spinner("Rendering PDF..."):
+                        st.session_state.roadmap_pdf = (
+                            current_hash, create_pdf_cached(st.session_state.generated_roadmap)
+                        )
+                except Exception as e:
+                    st.error(f"PDF Generation failed: {e}")
+            if st.session_state.roadmap_pdf and st.session_state.roadmap_pdf[0] == current_hash:
                 st.download_button(
                     label="📄 Export to PDF",
-                    data=pdf_bytes,
+                    data=st.session_state.roadmap_pdf[1],
                     file_name="career_roadmap.pdf",
                     mime="application/pdf"
                 )
-            except Exception as e:
-                st.error(f"PDF Generation failed: {e}")
     else:
         st.info("👈 Please upload your resume in the sidebar to start.")
 
 # Right Column: Chat
+CHAT_DISPLAY_LIMIT = 50
+
 with col2:
     st.subheader("💬 Career Advisor")
     
     # Chat Interface
     # We use a container to mimic a chat window
     with st.container():
-        for message in st.session_state.messages:
+        hidden = conversation.count() - CHAT_DISPLAY_LIMIT
+        if hidden > 0:
+            st.caption(f"{hidden} earlier messages are not shown.")
+        for message in conversation.messages(limit=CHAT_DISPLAY_LIMIT):
             avatar = "👤" if message["role"] == "user" else "🤖"
             with st.chat_message(message["role"], avatar=avatar):
                 st.markdown(message["content"])
 
     if prompt := st.chat_input("Ask for career advice..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        # Earlier turns (summarized past the recent window) give follow-ups their context.
+        history = conversation.context()
+        conversation.add("user", prompt, roll=False)
         with st.chat_message("user", avatar="👤"):
             st.markdown(prompt)
 
         with st.chat_message("assistant", avatar="🤖"):
-            with st.spinner("Thinking..."):
-                context_docs = rag.retrieve_relevant_careers(prompt)
-                context_text = str(context_docs)
-                response = rag.generate_response(context_text, prompt)
-                st.markdown(response)
+            if not engines.rag.loaded:
+                with st.spinner("Loading career data..."):
+                    engines.rag.get()
+            response = st.write_stream(engines.rag.get().answer_stream(prompt, history=history))
         
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        conversation.add("assistant", response, roll=False)
+        # Summarizing may call the model; do it after the reply, off the render path.
+        conversation.roll_in_background()
+
+# Debug Panel: per-stage latency, tokens and cache hits for this process
+if show_debug:
+    telemetry = get_telemetry()
+    st.markdown("---")
+    st.subheader("🔧 Debug Panel")
+
+    trace = telemetry.last_trace()
+    if trace:
+        st.markdown("**Last request**")
+        depth = {}
+        rows = []
+        for record in trace:
+            depth[record["id"]] = depth.get(record["parent"], -1) + 1
+            rows.append({
+                "stage": "  " * depth[record["id"]] + record["name"],
+                "ms": round(record["duration"] * 1000, 1),
+                "details": ", ".join(f"{k}={v}" for k, v in record["attributes"].items()),
+            })
+        st.dataframe(rows, use_container_width=True)
+    else:
+        st.info("No requests traced yet.")
 
+    dcol1, dcol2 = st.columns([1, 1])
+    with dcol1:
+        st.markdown("**Stages**")
+        st.dataframe(
+            [{"stage": stage, "count": v["count"], "mean ms": round(v["mean_ms"], 1)}
+             for stage, v in sorted(telemetry.stage_summary().items())],
+            use_container_width=True
+        )
+    with dcol2:
+        st.markdown("**Counters & gauges**")
+        metrics = {**telemetry.counters(), **telemetry.gauges()}
+        st.dataframe(
+            [{"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in labels), "value": value}
+             for (name, labels), value in sorted(metrics.items())],
+            use_container_width=True
+        )
 
+    prometheus_text = telemetry.prometheus_text()
+    with st.expander("Prometheus metrics"):
+        st.code(prometheus_text)
+    ecol1, ecol2, ecol3 = st.columns([1, 1, 1])
+    with ecol1:
+        st.download_button("📥 metrics.prom", data=prometheus_text, file_name="metrics.prom", mime="text/plain")
+    with ecol2:
+        st.download_button("📥 trace.json", data=json.dumps(telemetry.trace_events(), default=str),
+                           file_name="trace.json", mime="application/json")
+    with ecol3:
+        if st.button("💾 Save to ./metrics"):
+            prom_path, trace_path = telemetry.export("./metrics")
+            st.success(f"Saved {prom_path} and {trace_path}")
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from embedding_engine import EmbeddingEngine
+from fake_gemini import FakeEmbedder, FakeGenerativeModel
+from rag_pipeline import RAGPipeline
+
+class InMemoryVectorDB:
+    """
+    Minimal stand-in for VectorDB that returns a fixed Chroma-shaped result.
+    """
+    def query_by_embedding(self, query_embedding, n_results=5, where=None):
+        ids = [str(i) for i in range(n_results)]
+        return {
+            "ids": [ids],
+            "documents": [[f"Career {i}" for i in ids]],
+            "metadatas": [[{"role": f"Role {i}"} for i in ids]],
+            "distances": [[0.1 * int(i) for i in ids]],
+        }
+
+async def run(users, concurrency, embed_latency, generate_latency):
+    embedder = FakeEmbedder(latency=embed_latency)
+    engine = EmbeddingEngine(
+        backend="gemini",
+        embed_fn=embedder.embed_content,
+        aembed_fn=embedder.embed_content_async,
+        use_cache=False
+    )
+    rag = RAGPipeline(
+        vector_db=InMemoryVectorDB(),
+        embedding_engine=engine,
+        model=FakeGenerativeModel(latency=generate_latency),
+        max_concurrency=concurrency,
+        use_semantic_cache=False
+    )
+
+    latencies = []
+
+    async def one(i):
+        start = time.perf_counter()
+        await rag.aanswer(f"How do I become engineer #{i}?")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(users)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{users} requests in {elapsed:.2f}s ({users / elapsed:.1f} req/s)")
+    print(f"p50={latencies[len(latencies) // 2] * 1000:.0f}ms "
+          f"max={latencies[-1] * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark RAGPipeline.aanswer against a fake model.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--generate-latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.concurrency, args.embed_latency, args.generate_latency))
@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from run_benchmarks import QUERIES, percentile
+
+# Relative weight of each endpoint in the generated traffic.
+MIX = {
+    "retrieve": 4,
+    "answer": 2,
+    "answer/stream": 2,
+    "roadmap/stream": 1,
+    "parse": 1,
+}
+ROLES = ["Data Engineer", "Backend Developer", "Security Analyst", "ML Engineer", "Product Manager"]
+RESUME_TEXT = """Jane Doe
+jane.doe@example.com | +1 555 0100
+Skills: Python, SQL, Docker, Airflow, AWS
+Experience
+Data Analyst at Acme Corp, 2020 - 2023
+Education
+BSc Computer Science, State University, 2020
+"""
+
+def prepare(args):
+    """
+    Ingests a synthetic catalog into a NumPy index in `args.dir` with the
+    fake embedder, so the server can run there with API_FAKE_MODELS=1.
+    """
+    from embedding_engine import EmbeddingEngine
+    from fake_gemini import FakeEmbedder
+    from ingest_data import ingest_careers
+    from numpy_vector_db import NumpyVectorDB
+    from synthetic import write_catalog
+
+    embedder = FakeEmbedder(latency=0.0)
+    engine = EmbeddingEngine(backend="gemini", embed_fn=embedder.embed_content, use_cache=False)
+    os.makedirs(args.dir, exist_ok=True)
+    catalog = write_catalog(os.path.join(args.dir, "careers.jsonl"), args.docs)
+    ingest_careers(catalog, db=NumpyVectorDB(persist_directory=os.path.join(args.dir, "numpy_db")), engine=engine)
+    print(f"Prepared {args.docs} careers in {args.dir}. Start the server from there:")
+    print(f"  cd {args.dir} && API_FAKE_MODELS=1 VECTOR_DB_BACKEND=numpy "
+          f"python {os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/api.py'))} --workers 4")
+
+def make_request(endpoint, i):
+    query = f"{QUERIES[i % len(QUERIES)]} ({i})"
+    if endpoint in ("retrieve", "answer", "answer/stream"):
+        return {"query": query, "n_results": 3}
+    if endpoint.startswith("roadmap"):
+        return {"skills": ["Python", "SQL"], "target_role": f"{ROLES[i % len(ROLES)]} {i}"}
+    return {"text": RESUME_TEXT}
+
+def send(url, endpoint, payload, timeout):
+    """
+    POSTs `payload` and reads the whole response.
+    Returns (status, seconds to first byte, total seconds).
+    """
+    data = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(f"{url}/{endpoint}", data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read(1)
+            first_byte = time.perf_counter() - start
+            response.read()
+            return response.status, first_byte, time.perf_counter() - start
+    except urllib.error.HTTPError as e:
+        elapsed = time.perf_counter() - start
+        return e.code, elapsed, elapsed
+    except OSError:
+        elapsed = time.perf_counter() - start
+        return 0, elapsed, elapsed
+
+def run(args):
+    endpoints = [name for name, weight in MIX.items() for _ in range(weight)]
+    rng = random.Random(args.seed)
+    plan = [(rng.choice(endpoints), i) for i in range(args.requests)]
+
+    def one(item):
+        endpoint, i = item
+        return endpoint, send(args.url, endpoint, make_request(endpoint, i), args.timeout)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(one, plan))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(outcomes)} requests in {elapsed:.2f}s ({len(outcomes) / elapsed:.1f} req/s) "
+          f"at concurrency {args.concurrency}")
+    report = {}
+    for endpoint in MIX:
+        results = [r for name, r in outcomes if name == endpoint]
+        if not results:
+            continue
+        ok = [r for r in results if r[0] == 200]
+        statuses = {}
+        for status, _, _ in results:
+            statuses[status] = statuses.get(status, 0) + 1
+        stats = {"count": len(results), "errors": len(results) - len(ok), "statuses": statuses}
+        if ok:
+            totals = [r[2] for r in ok]
+            firsts = [r[1] for r in ok]
+            stats.update(p50_ms=percentile(totals, 50) * 1000, p95_ms=percentile(totals, 95) * 1000,
+                         p99_ms=percentile(totals, 99) * 1000, ttfb_p50_ms=percentile(firsts, 50) * 1000)
+            print(f"{endpoint:<15} n={stats['count']:<5} err={stats['errors']:<4} p50={stats['p50_ms']:.0f}ms "
+                  f"p95={stats['p95_ms']:.0f}ms p99={stats['p99_ms']:.0f}ms ttfb_p50={stats['ttfb_p50_ms']:.0f}ms")
+        else:
+            print(f"{endpoint:<15} n={stats['count']:<5} all failed: {statuses}")
+        report[endpoint] = stats
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "elapsed": elapsed, "endpoints": report}, f, indent=2)
+        print(f"Wrote {args.json}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the HTTP API (app/api.py) with a mix of endpoints.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prepare_parser = commands.add_parser("prepare", help="Build a synthetic index for a fake-model server.")
+    prepare_parser.add_argument("--dir", required=True, help="Working directory for the server.")
+    prepare_parser.add_argument("--docs", type=int, default=5000)
+
+    run_parser = commands.add_parser("run", help="Send concurrent requests and report latency per endpoint.")
+    run_parser.add_argument("--url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--requests", type=int, default=500)
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--timeout", type=float, default=60.0, help="Client-side timeout per request in seconds.")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--json", default=None, help="Also write the report to this JSON file.")
+
+    args = parser.parse_args()
+    if args.command == "prepare":
+        prepare(args)
+    else:
+        run(args)
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+# Run in a fresh interpreter per sample so every import is cold.
+PROBE = """
+import importlib, json, sys, time
+sys.path.append({src!r})
+timings = {{}}
+
+def timed(name, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+        timings[name] = time.perf_counter() - start
+    except Exception as e:
+        timings[name] = None
+        print(f"{{name}} failed: {{e}}", file=sys.stderr)
+
+timed("app_imports", lambda: (importlib.import_module("engines"), importlib.import_module("telemetry")))
+for module in {modules!r}:
+    timed("import " + module, lambda: importlib.import_module(module))
+if {first_use!r}:
+    from engines import Engines
+    engines = Engines()
+    for name in ("rag", "roadmap_engine", "matcher"):
+        timed("first_use " + name, getattr(engines, name).get)
+print("TIMINGS " + json.dumps(timings))
+"""
+
+HEAVY_MODULES = ["chromadb", "google.generativeai", "fitz", "fpdf"]
+
+def sample(first_use):
+    code = PROBE.format(src=SRC, modules=HEAVY_MODULES, first_use=first_use)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("TIMINGS "):
+            return json.loads(line[len("TIMINGS "):]), result.stderr
+    raise RuntimeError(f"Probe failed:\n{result.stderr}")
+
+def run(runs, first_use):
+    samples = []
+    errors = set()
+    for _ in range(runs):
+        timings, stderr = sample(first_use)
+        samples.append(timings)
+        errors.update(line for line in stderr.splitlines() if "failed:" in line)
+
+    print(f"Startup timings over {runs} cold starts (median):")
+    for name in samples[0]:
+        values = [s[name] for s in samples if s.get(name) is not None]
+        if values:
+            print(f"  {name:<30} {statistics.median(values) * 1000:8.1f}ms")
+        else:
+            print(f"  {name:<30} {'n/a':>10}")
+    for error in sorted(errors):
+        print(f"  ! {error}")
+    print("The app pays only for app_imports before first paint; the rest is deferred to first use or warm-up.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start import and engine construction times.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-first-use", action="store_true",
+                        help="Skip building the engines (which needs the API key and vector store).")
+    args = parser.parse_args()
+    run(args.runs, not args.no_first_use)
@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from embedding_engine import EmbeddingEngine
+from fake_gemini import FakeEmbedder, FakeGenerativeModel
+from ingest_data import ingest_careers
+from numpy_vector_db import NumpyVectorDB
+from rag_pipeline import RAGPipeline
+from resume_parser import extract_text_from_pdf, parse_resume
+from roadmap_engine import RoadmapEngine
+from synthetic import FIELDS, generate_resume_pdfs, write_catalog
+
+QUERIES = [
+    "How do I become a data engineer?",
+    "Which roles use Kubernetes and Terraform?",
+    "I know React and TypeScript, what should I learn next?",
+    "Careers in security for someone who knows Python",
+    "What does a product manager do day to day?",
+]
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def summarize(name, latencies, elapsed, items=None):
+    items = items if items is not None else len(latencies)
+    report = {
+        "stage": name,
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput": items / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    print(f"{name:<10} n={report['count']:<6} p50={report['p50_ms']:.1f}ms p95={report['p95_ms']:.1f}ms "
+          f"p99={report['p99_ms']:.1f}ms {report['throughput']:.1f}/s rss={report['peak_rss_mb']:.0f}MB")
+    return report
+
+def timed(fn, args_list):
+    latencies = []
+    start = time.perf_counter()
+    for args in args_list:
+        t = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - t)
+    return latencies, time.perf_counter() - start
+
+def bench_ingest(workdir, docs, batch_size, engine):
+    catalog = write_catalog(os.path.join(workdir, "careers.jsonl"), docs)
+    db = NumpyVectorDB(persist_directory=os.path.join(workdir, "numpy_db"))
+    start = time.perf_counter()
+    ingest_careers(catalog, db=db, engine=engine, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return db, summarize("ingest", [elapsed], elapsed, items=docs)
+
+def bench_retrieve(rag, queries, where_every=4):
+    # Every `where_every`-th query is category-filtered to cover that path too.
+    categories = list(FIELDS)
+    args_list = []
+    for i in range(queries):
+        where = {"category": categories[i % len(categories)]} if i % where_every == 0 else None
+        args_list.append((f"{QUERIES[i % len(QUERIES)]} ({i})", 3, where))
+    latencies, elapsed = timed(rag.retrieve_relevant_careers, args_list)
+    return summarize("retrieve", latencies, elapsed)
+
+def bench_parse(resumes, pages, model):
+    # The fake model only answers if the rule-based stage leaves a field empty.
+    pdfs = generate_resume_pdfs(resumes, pages=pages)
+    latencies, elapsed = timed(lambda pdf: parse_resume(extract_text_from_pdf(pdf), model=model), [(pdf,) for pdf in pdfs])
+    return summarize("parse", latencies, elapsed)
+
+def bench_generate(rag, roadmap_engine, requests):
+    args_list = [(f"{QUERIES[i % len(QUERIES)]} ({i})",) for i in range(requests)]
+    answers, elapsed = timed(rag.answer, args_list)
+    roadmaps, roadmap_elapsed = timed(
+        roadmap_engine.generate_roadmap,
+        [(["Python", "SQL"], f"Data Engineer {i}") for i in range(requests)]
+    )
+    return [summarize("answer", answers, elapsed), summarize("roadmap", roadmaps, roadmap_elapsed)]
+
+def run(args):
+    embedder = FakeEmbedder(latency=args.embed_latency, jitter=args.jitter,
+                            failure_rate=args.failure_rate, seed=args.seed)
+    model = FakeGenerativeModel(latency=args.generate_latency, jitter=args.jitter,
+                                failure_rate=args.failure_rate, seed=args.seed)
+    engine = EmbeddingEngine(
+        backend="gemini",
+        embed_fn=embedder.embed_content,
+        aembed_fn=embedder.embed_content_async,
+        use_cache=False
+    )
+
+    reports = []
+    with tempfile.TemporaryDirectory() as workdir:
+        db, report = bench_ingest(workdir, args.docs, args.batch_size, engine)
+        reports.append(report)
+        rag = RAGPipeline(vector_db=db, embedding_engine=engine, model=model,
+                          use_semantic_cache=False, retrieval_mode=args.retrieval_mode)
+        reports.append(bench_retrieve(rag, args.queries))
+        reports.append(bench_parse(args.resumes, args.pages, model))
+        reports.extend(bench_generate(rag, RoadmapEngine(model=model, use_cache=False), args.requests))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "stages": reports}, f, indent=2)
+        print(f"Wrote {args.json}")
+    return reports
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ingest, retrieval, resume parsing and generation against fake models.")
+    parser.add_argument("--docs", type=int, default=1000, help="Synthetic careers to ingest (1k to 1M).")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--resumes", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=1, help="Pages per synthetic resume.")
+    parser.add_argument("--requests", type=int, default=20, help="Answers and roadmaps to generate.")
+    parser.add_argument("--retrieval-mode", choices=["vector", "hybrid"], default="hybrid")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Fake embedding latency in seconds.")
+    parser.add_argument("--generate-latency", type=float, default=0.0, help="Fake generation latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- latency jitter in seconds.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of fake API calls that fail.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Also write the report to this JSON file.")
+    run(parser.parse_args())
@@ -0,0 +1,79 @@
+import json
+import os
+import random
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from create_dummy_pdf import build_dummy_pdf
+from skills import KNOWN_SKILLS
+
+SENIORITY = ["Junior", "Associate", "Senior", "Lead", "Principal", "Staff"]
+FIELDS = {
+    "Data": ["Data Scientist", "Data Engineer", "ML Engineer", "Analytics Engineer", "BI Analyst"],
+    "Web Development": ["Frontend Developer", "Backend Developer", "Full Stack Developer", "API Engineer"],
+    "Infrastructure": ["DevOps Engineer", "Site Reliability Engineer", "Cloud Architect", "Platform Engineer"],
+    "Management": ["Product Manager", "Engineering Manager", "Project Manager", "Scrum Master"],
+    "Security": ["Security Engineer", "Penetration Tester", "Security Analyst"],
+}
+VERBS = ["Design", "Build", "Maintain", "Analyze", "Operate", "Scale", "Lead", "Automate"]
+OBJECTS = ["data pipelines", "web applications", "cloud infrastructure", "product roadmaps",
+           "machine learning models", "internal tools", "APIs", "dashboards"]
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Diego", "Elif", "Farah", "Goran", "Hana", "Ivan", "Jaya"]
+LAST_NAMES = ["Patel", "Smith", "Li", "Garcia", "Yilmaz", "Khan", "Novak", "Sato", "Petrov", "Rao"]
+
+def generate_careers(count, seed=0):
+    """
+    Yields `count` synthetic career records shaped like data/careers.jsonl.
+    """
+    rng = random.Random(seed)
+    categories = list(FIELDS)
+    for i in range(count):
+        category = rng.choice(categories)
+        role = f"{rng.choice(SENIORITY)} {rng.choice(FIELDS[category])} #{i}"
+        skills = rng.sample(KNOWN_SKILLS, rng.randint(3, 7))
+        description = (
+            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} and {rng.choice(VERBS).lower()} "
+            f"{rng.choice(OBJECTS)}. Requires {', '.join(skills[:-1])}, and {skills[-1]}."
+        )
+        yield {"role": role, "description": description, "category": category}
+
+def write_catalog(path, count, seed=0):
+    """
+    Writes a synthetic career catalog to `path` as JSONL.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for record in generate_careers(count, seed):
+            f.write(json.dumps(record) + "\n")
+    return path
+
+def generate_resume_text(rng):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(KNOWN_SKILLS, rng.randint(4, 10))
+    start = rng.randint(2010, 2020)
+    return f"""
+    {first} {last}
+    Email: {first.lower()}.{last.lower()}@example.com
+    Phone: (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}
+
+    Summary:
+    {rng.choice(VERBS)}s {rng.choice(OBJECTS)} with a focus on quality.
+
+    Skills:
+    {", ".join(skills)}
+
+    Experience:
+    {rng.choice(SENIORITY)} Developer at Company {rng.randint(1, 500)} ({start}-Present)
+    - {rng.choice(VERBS)}ed {rng.choice(OBJECTS)}.
+
+    Education:
+    B.S. in Computer Science, University {rng.randint(1, 50)} ({start - 4}-{start})
+    """
+
+def generate_resume_pdfs(count, seed=0, pages=1):
+    """
+    Returns `count` synthetic resume PDFs as bytes, built with create_dummy_pdf.
+    """
+    rng = random.Random(seed)
+    return [build_dummy_pdf(generate_resume_text(rng), pages=pages) for _ in range(count)]
@@ -1,31 +1,43 @@
 import fitz  # PyMuPDF
 
-def create_dummy_pdf(output_path):
-    doc = fitz.open()
-    page = doc.new_page()
-    
-    text = """
+DEFAULT_TEXT = """
     John Doe
     Email: john.doe@example.com
     Phone: (555) 123-4567
-    
+
     Summary:
     Motivated software enthusiast with a passion for data and AI.
-    
+
     Skills:
     Python, SQL, Machine Learning, Data Analysis, Git, Communication
-    
+
     Experience:
     Junior Developer at Tech Corp (2022-Present)
     - Developed Python scripts for automation.
     - Worked with SQL databases.
-    
+
     Education:
     B.S. in Computer Science, University of Tech (2018-2022)
     """
-    
+
+def build_dummy_pdf(text=DEFAULT_TEXT, pages=1):
+    """
+    Returns the bytes of a PDF with `text` on the first page and filler
+    text on `pages - 1` more pages.
+    """
+    doc = fitz.open()
+    page = doc.new_page()
     page.insert_text((50, 50), text, fontsize=12)
-    doc.save(output_path)
+    for i in range(1, pages):
+        filler = doc.new_page()
+        filler.insert_text((50, 50), f"Project portfolio, page {i + 1}.\n" * 40, fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def create_dummy_pdf(output_path, text=DEFAULT_TEXT, pages=1):
+    with open(output_path, "wb") as f:
+        f.write(build_dummy_pdf(text, pages))
     print(f"Created dummy PDF at {output_path}")
 
 if __name__ == "__main__":
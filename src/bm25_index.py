@@ -0,0 +1,135 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "such", "that", "the", "to", "with", "requires", "using",
+}
+
+# Slash- and hyphen-joined names kept as one term; other compounds such as
+# "django/flask" or "machine-learning" are split into their parts.
+COMPOUND_TERMS = {"ci/cd", "tcp/ip", "ui/ux", "pl/sql", "t-sql", "a/b"}
+
+# Bumped when tokenize() changes, so indexes built with the old terms are rebuilt.
+TOKENIZER_VERSION = 2
+
+def tokenize(text):
+    """
+    Lower-cases and splits text into terms, keeping tech names such as
+    "c++", "c#", "node.js" and "ci/cd" intact.
+    """
+    terms = []
+    for term in re.findall(r"[a-z0-9][a-z0-9+#./-]*", text.lower()):
+        term = term.rstrip("./-")
+        if term in COMPOUND_TERMS:
+            terms.append(term)
+        else:
+            terms.extend(part.rstrip(".") for part in re.split(r"[/-]+", term))
+    return [t for t in terms if t and t not in STOPWORDS]
+
+class BM25Index:
+    def __init__(self, path, k1=1.5, b=0.75):
+        """
+        Inverted-index BM25 keyword search over career documents.
+        Updated incrementally at ingest time and persisted as JSON at `path`.
+        Per-document metadata is kept so searches can honour the same
+        equality filters as the vector stores.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._docs = {}      # doc id -> {"len": int, "tf": {term: count}, "meta": dict}
+        self._postings = {}  # term -> {doc id: count}
+        self._total_len = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            # An index tokenized differently starts empty; ingest_data backfills it.
+            if data.get("version") == TOKENIZER_VERSION:
+                for doc_id, doc in data["docs"].items():
+                    self._insert(doc_id, doc)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def _insert(self, doc_id, doc):
+        self._docs[doc_id] = doc
+        self._total_len += doc["len"]
+        for term, count in doc["tf"].items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_len -= doc["len"]
+        for term in doc["tf"]:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def upsert(self, ids, documents, metadatas=None):
+        """
+        Adds or replaces documents in the index.
+        """
+        metadatas = metadatas or [{}] * len(ids)
+        with self._lock:
+            for doc_id, document, metadata in zip(ids, documents, metadatas):
+                self._remove(doc_id)
+                terms = tokenize(document)
+                self._insert(doc_id, {"len": len(terms), "tf": dict(Counter(terms)), "meta": metadata or {}})
+
+    def delete(self, ids):
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+    def save(self):
+        """
+        Writes the index to disk atomically.
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": TOKENIZER_VERSION, "docs": self._docs}, f)
+        os.replace(tmp_path, self.path)
+
+    def search(self, query, n_results=10, where=None):
+        """
+        Returns up to `n_results` (doc id, score) pairs, best first.
+        `where` is an equality filter on metadata, e.g. {"category": "Data"}.
+        """
+        terms = tokenize(query)
+        if not terms or not self._docs:
+            return []
+
+        count = len(self._docs)
+        avg_len = self._total_len / count or 1.0
+        scores = Counter()
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                doc_len = self._docs[doc_id]["len"]
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len))
+
+        if where:
+            scores = Counter({
+                doc_id: score for doc_id, score in scores.items()
+                if all(self._docs[doc_id]["meta"].get(k) == v for k, v in where.items())
+            })
+        return scores.most_common(n_results)
@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from resume_parser import extract_text_from_pdf, parse_resume
+
+def list_pdfs(source):
+    """
+    Lists PDF paths from a directory (searched recursively) or from a
+    manifest file with one path per line.
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".pdf"))
+        return sorted(paths)
+    with open(source, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def load_checkpoint(path):
+    """
+    Returns the set of PDF paths already processed in an earlier run.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+def process_resumes(source, output, checkpoint=None, extract_workers=None, llm_concurrency=4, window=256,
+                    errors=None):
+    """
+    Extracts and parses every PDF under `source`, appending one JSON line
+    per parsed resume to `output`. Parsed paths are recorded in `checkpoint`,
+    so an interrupted run resumes where it stopped and failures are retried.
+    Failures go to `errors` (default: <output>.errors), which is rewritten
+    each run so it lists only the paths that still fail; `output` never
+    holds more than one record per path.
+    Extraction runs in a process pool; parsing runs with at most
+    `llm_concurrency` Gemini calls in flight. At most `window` resumes are
+    held in memory at a time.
+    """
+    checkpoint = checkpoint or output + ".checkpoint"
+    errors = errors or output + ".errors"
+    done = load_checkpoint(checkpoint)
+    paths = [p for p in list_pdfs(source) if p not in done]
+    print(f"{len(paths)} resumes to process ({len(done)} already done).")
+
+    stats = {"ok": 0, "failed": 0}
+    start = time.perf_counter()
+
+    with open(output, "a", encoding="utf-8") as out, \
+            open(checkpoint, "a", encoding="utf-8") as ckpt, \
+            open(errors, "w", encoding="utf-8") as err, \
+            ProcessPoolExecutor(max_workers=extract_workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=llm_concurrency) as parse_pool:
+
+        def write(path, record):
+            if "error" in record:
+                # Failures are not checkpointed, so the next run retries them.
+                err.write(json.dumps(record, ensure_ascii=False) + "\n")
+                err.flush()
+                stats["failed"] += 1
+            else:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                ckpt.write(path + "\n")
+                ckpt.flush()
+                stats["ok"] += 1
+            processed = stats["ok"] + stats["failed"]
+            if processed % 50 == 0:
+                rate = processed / (time.perf_counter() - start)
+                print(f"Processed {processed}/{len(paths)} ({rate:.1f} resumes/s)")
+
+        for i in range(0, len(paths), window):
+            batch = paths[i:i + window]
+            pending = {extract_pool.submit(extract_text_from_pdf, p): ("extract", p) for p in batch}
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, path = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        write(path, {"path": path, "error": f"{stage} failed: {e}"})
+                        continue
+                    if stage == "extract":
+                        pending[parse_pool.submit(parse_resume, result)] = ("parse", path)
+                    elif "error" in result:
+                        write(path, {"path": path, "error": result["error"]})
+                    else:
+                        write(path, {"path": path, "data": result})
+
+    elapsed = time.perf_counter() - start
+    processed = stats["ok"] + stats["failed"]
+    rate = processed / elapsed if elapsed else 0.0
+    print(f"Done: {stats['ok']} parsed, {stats['failed']} failed in {elapsed:.1f}s ({rate:.2f} resumes/s).")
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-parse resume PDFs to JSONL.")
+    parser.add_argument("source", help="Directory of PDFs or a manifest file with one path per line.")
+    parser.add_argument("output", help="Output JSONL file (appended to).")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint).")
+    parser.add_argument("--errors", help="Failures from this run (default: <output>.errors).")
+    parser.add_argument("--extract-workers", type=int, default=None, help="PDF extraction processes.")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Concurrent Gemini parse calls.")
+    args = parser.parse_args()
+    process_resumes(args.source, args.output, args.checkpoint, args.extract_workers, args.llm_concurrency,
+                    errors=args.errors)
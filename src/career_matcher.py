@@ -0,0 +1,176 @@
+import os
+
+import numpy as np
+from resume_rules import match_skills
+from skills import normalize_skill
+
+def load_skill_index(path):
+    """
+    Returns the arrays of the skill index at `path`, or None if there is
+    none or it predates per-career ids (and so cannot be updated in place).
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=True) as data:
+        if "ids" not in data.files:
+            return None
+        return {key: data[key] for key in data.files}
+
+def update_skill_index(path, embedding_engine, careers=(), deleted_ids=(), rebuild=False):
+    """
+    Updates the per-career skill vectors for `CareerMatcher` saved at `path` (.npz).
+    `careers` is an iterable of (id, role, category, skills) to add or
+    replace; careers in `deleted_ids` are dropped. Only skills not already
+    in the index are embedded, and skills no career uses any more are
+    pruned. With `rebuild`, the existing index is discarded first.
+    The index stores careers in CSR form: career c uses skills
+    indices[offsets[c]:offsets[c + 1]].
+    """
+    careers = list(careers)
+    index = None if rebuild else load_skill_index(path)
+    if index is None:
+        index = {
+            "ids": np.array([], dtype=object),
+            "roles": np.array([], dtype=object),
+            "categories": np.array([], dtype=object),
+            "skill_names": np.array([], dtype=object),
+            "skill_vectors": np.empty((0, 0), dtype=np.float32),
+            "offsets": np.zeros(1, dtype=np.int64),
+            "indices": np.array([], dtype=np.int64),
+        }
+    elif not careers and not deleted_ids:
+        return
+
+    # Drop deleted and replaced careers with their slices of `indices`.
+    dropped = set(deleted_ids) | {career[0] for career in careers}
+    counts = np.diff(index["offsets"])
+    keep = np.fromiter((i not in dropped for i in index["ids"]), dtype=bool, count=len(index["ids"]))
+    ids = list(index["ids"][keep])
+    roles = list(index["roles"][keep])
+    categories = list(index["categories"][keep])
+    indices = list(index["indices"][np.repeat(keep, counts)])
+    offsets = list(np.concatenate([[0], np.cumsum(counts[keep])]))
+
+    names = list(index["skill_names"])
+    skill_ids = {name: i for i, name in enumerate(names)}
+    for career_id, role, category, skills in careers:
+        for skill in skills:
+            indices.append(skill_ids.setdefault(skill, len(skill_ids)))
+        ids.append(career_id)
+        roles.append(role)
+        categories.append(category)
+        offsets.append(len(indices))
+
+    vectors = index["skill_vectors"]
+    new_names = list(skill_ids)[len(names):]
+    if new_names:
+        new_vectors = np.asarray(embedding_engine.generate_embeddings_batch(new_names), dtype=np.float32)
+        new_vectors /= np.linalg.norm(new_vectors, axis=1, keepdims=True)
+        vectors = np.vstack([vectors, new_vectors]) if len(names) else new_vectors
+        names += new_names
+
+    # Prune skills no career refers to and renumber the rest.
+    indices = np.array(indices, dtype=np.int64)
+    used = np.zeros(len(names), dtype=bool)
+    used[indices] = True
+    if not used.all():
+        renumber = np.cumsum(used) - 1
+        indices = renumber[indices]
+        names = [name for name, u in zip(names, used) if u]
+        vectors = vectors[used] if len(names) else np.empty((0, 0), dtype=np.float32)
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    # np.savez appends .npz unless it is already there.
+    np.savez(
+        path,
+        ids=np.array(ids, dtype=object),
+        roles=np.array(roles, dtype=object),
+        categories=np.array(categories, dtype=object),
+        skill_names=np.array(names, dtype=object),
+        skill_vectors=vectors,
+        offsets=np.array(offsets, dtype=np.int64),
+        indices=indices,
+    )
+    print(f"Saved skill index: {len(ids)} careers, {len(names)} distinct skills.")
+
+def build_skill_index(careers, embedding_engine, path):
+    """
+    Builds the skill index at `path` from scratch. `careers` is an iterable
+    of (role, category, description) tuples; skills are taken from each
+    description with the skill dictionary.
+    """
+    update_skill_index(
+        path, embedding_engine,
+        ((str(i), role, category, match_skills(description))
+         for i, (role, category, description) in enumerate(careers)),
+        rebuild=True
+    )
+
+class CareerMatcher:
+    def __init__(self, embedding_engine, path, threshold=0.8):
+        """
+        Matches a resume's skills against precomputed career skill vectors.
+        A career skill counts as matched when some resume skill has cosine
+        similarity >= `threshold` with it (or the same canonical name).
+        The index at `path` is loaded on first use.
+        """
+        self.embedding_engine = embedding_engine
+        self.path = path
+        self.threshold = threshold
+        self._index = None
+
+    def available(self):
+        return os.path.exists(self.path)
+
+    def _load(self):
+        if self._index is None:
+            data = np.load(self.path, allow_pickle=True)
+            self._index = {key: data[key] for key in data.files}
+            self._index["canonical"] = np.array([normalize_skill(n) for n in self._index["skill_names"]], dtype=object)
+        return self._index
+
+    def match(self, skills, top_n=5):
+        """
+        Ranks careers by how well `skills` cover each career's required skills.
+        Returns a list of dicts with `role`, `category`, `score` (mean best
+        similarity over the career's skills), `matched_skills` and `missing_skills`.
+        """
+        index = self._load()
+        skills = [s for s in skills if s and s.strip()]
+        names = index["skill_names"]
+        if not skills or len(names) == 0:
+            return []
+
+        resume = np.asarray(self.embedding_engine.generate_embeddings_batch(skills), dtype=np.float32)
+        resume /= np.linalg.norm(resume, axis=1, keepdims=True)
+
+        # Best similarity of any resume skill to each catalog skill, in one matrix product.
+        best = (resume @ index["skill_vectors"].T).max(axis=0)
+        canonical_resume = {normalize_skill(s) for s in skills}
+        best[np.isin(index["canonical"], list(canonical_resume))] = 1.0
+
+        offsets, indices = index["offsets"], index["indices"]
+        counts = np.diff(offsets)
+        per_skill = best[indices]
+        # Sum per career over its CSR slice; careers without skills score 0.
+        sums = np.zeros(len(counts), dtype=np.float32)
+        nonempty = counts > 0
+        if len(per_skill):
+            sums[nonempty] = np.add.reduceat(per_skill, offsets[:-1][nonempty])
+        scores = np.divide(sums, counts, out=np.zeros_like(sums), where=nonempty)
+
+        top = np.argsort(-scores)[:top_n]
+        matches = []
+        for c in top:
+            career_skills = indices[offsets[c]:offsets[c + 1]]
+            matched = best[career_skills] >= self.threshold
+            matches.append({
+                "role": index["roles"][c],
+                "category": index["categories"][c],
+                "score": float(scores[c]),
+                "matched_skills": [names[i] for i in career_skills[matched]],
+                "missing_skills": [names[i] for i in career_skills[~matched]],
+            })
+        return matches
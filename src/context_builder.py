@@ -0,0 +1,78 @@
+import math
+import re
+
+# Rough average for English text with Gemini's tokenizer.
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    """
+    Estimates the token count of `text` without calling the API.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    Cuts `text` to roughly `max_tokens` tokens, preferring a word boundary.
+    """
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > limit // 2 else limit].rstrip() + " ..."
+
+def _shingles(text, size=3):
+    words = re.findall(r"\w+", text.lower())
+    return {tuple(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+def _is_near_duplicate(shingles, seen, threshold):
+    for other in seen:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= threshold:
+            return True
+    return False
+
+def build_context(results, max_tokens=800, dedupe_threshold=0.85):
+    """
+    Turns a Chroma query result into prompt context.
+    Keeps only documents and their metadata, drops near-identical passages,
+    and adds passages in order of retrieval distance until `max_tokens` is
+    used; the last passage is truncated if it does not fit.
+    Returns a dict with the context `text`, the estimated `tokens` used and
+    the `ids` included.
+    """
+    ids = results.get("ids", [[]])[0]
+    documents = (results.get("documents") or [[]])[0]
+    metadatas = (results.get("metadatas") or [[None] * len(ids)])[0]
+    distances = (results.get("distances") or [[0.0] * len(ids)])[0]
+
+    ranked = sorted(zip(distances, ids, documents, metadatas), key=lambda row: row[0])
+    lines, used_ids, seen = [], [], []
+    used = 0
+    for _, doc_id, document, metadata in ranked:
+        if not document:
+            continue
+        shingles = _shingles(document)
+        if _is_near_duplicate(shingles, seen, dedupe_threshold):
+            continue
+
+        metadata = metadata or {}
+        label = metadata.get("role", "Career")
+        if metadata.get("category"):
+            label = f"{label} ({metadata['category']})"
+        line = f"- {label}: {document}"
+
+        remaining = max_tokens - used
+        if remaining <= 0:
+            break
+        if estimate_tokens(line) > remaining:
+            # Only keep a truncated passage if a useful part of it fits.
+            if remaining < 20:
+                break
+            line = truncate_to_tokens(line, remaining)
+
+        lines.append(line)
+        used_ids.append(doc_id)
+        seen.append(shingles)
+        used += estimate_tokens(line)
+
+    return {"text": "\n".join(lines), "tokens": used, "ids": used_ids}
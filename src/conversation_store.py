@@ -0,0 +1,240 @@
+import os
+import sqlite3
+import threading
+import time
+from context_builder import estimate_tokens, truncate_to_tokens
+from telemetry import span
+
+ROLE_LABELS = {"user": "User", "assistant": "Assistant"}
+# Cap on unsummarized messages read at once; rolling keeps far fewer than this.
+MAX_WINDOW_MESSAGES = 200
+
+class ConversationStore:
+    def __init__(self, path="./cache/conversations.sqlite3"):
+        """
+        Append-only chat history keyed by session id, with one rolling
+        summary per session. Backed by SQLite in WAL mode like SQLiteCache,
+        so history survives restarts and is shared by worker processes.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+            "role TEXT NOT NULL, content TEXT NOT NULL, tokens INTEGER NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, through_id INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def append(self, session_id, role, content):
+        """
+        Appends a message and returns its id.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO messages (session_id, role, content, tokens, created) VALUES (?, ?, ?, ?, ?)",
+                (session_id, role, content, estimate_tokens(content), time.time())
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def tail(self, session_id, limit=50, after_id=0):
+        """
+        Returns up to the `limit` most recent messages with id > `after_id`,
+        oldest first, as dicts with `id`, `role`, `content` and `tokens`.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, role, content, tokens FROM messages WHERE session_id = ? AND id > ? "
+                "ORDER BY id DESC LIMIT ?",
+                (session_id, after_id, limit)
+            ).fetchall()
+        return [{"id": i, "role": r, "content": c, "tokens": t} for i, r, c, t in reversed(rows)]
+
+    def count(self, session_id):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def get_summary(self, session_id):
+        """
+        Returns (summary text, id of the last message it covers); ("", 0) if none.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, through_id FROM summaries WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def set_summary(self, session_id, summary, through_id, previous_id=None):
+        """
+        Stores the session's summary. With `previous_id`, stores it only if
+        the current summary still ends at that message, so two rolls of the
+        same window cannot both apply; returns whether it was stored.
+        """
+        with self._lock:
+            if previous_id is not None:
+                row = self._conn.execute(
+                    "SELECT through_id FROM summaries WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if (row[0] if row else 0) != previous_id:
+                    return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (session_id, summary, through_id, updated) VALUES (?, ?, ?, ?)",
+                (session_id, summary, through_id, time.time())
+            )
+            self._conn.commit()
+            return True
+
+    def clear(self, session_id):
+        """
+        Deletes a session's messages and summary.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM summaries WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+def format_messages(messages):
+    return "\n".join(f"{ROLE_LABELS.get(m['role'], m['role'])}: {m['content']}" for m in messages)
+
+def extractive_summary(summary, messages, max_tokens):
+    """
+    Folds `messages` into `summary` without a model call: one line per
+    message cut to its first sentence, dropping the oldest lines once the
+    summary exceeds `max_tokens`.
+    """
+    lines = [line for line in summary.split("\n") if line]
+    for m in messages:
+        first = m["content"].strip().split("\n")[0]
+        sentence = first.split(". ")[0]
+        lines.append(f"{ROLE_LABELS.get(m['role'], m['role'])}: {truncate_to_tokens(sentence, 40)}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+def llm_summarizer(llm):
+    """
+    Returns a summarize function for `Conversation` that asks `llm` (an
+    LLMClient) to update the running summary, falling back to the
+    extractive summary if the call fails.
+    """
+    def summarize(summary, messages, max_tokens):
+        prompt = f"""
+        Update the running summary of a career-advice conversation with the new messages below.
+        Keep the user's background, goals and the advice given. Write at most {max_tokens * 3 // 4} words.
+
+        Current summary:
+        {summary or "(none)"}
+
+        New messages:
+        {format_messages(messages)}
+
+        Updated summary:
+        """
+        try:
+            return truncate_to_tokens(llm.generate(prompt).strip(), max_tokens)
+        except Exception as e:
+            print(f"Conversation summary failed ({e}); using extractive summary.")
+            return extractive_summary(summary, messages, max_tokens)
+    return summarize
+
+class Conversation:
+    def __init__(self, store, session_id, summarize_fn=None, window_tokens=600, summary_tokens=300):
+        """
+        One session's history with a rolling summarized window.
+        Recent messages are kept verbatim up to `window_tokens`; older ones
+        are folded into a summary of at most `summary_tokens` by
+        `summarize_fn(summary, messages, max_tokens)` (default: extractive).
+        `context()` therefore stays under window_tokens + summary_tokens
+        however long the conversation gets, even before a roll has caught up.
+        """
+        self.store = store
+        self.session_id = session_id
+        self.summarize_fn = summarize_fn or extractive_summary
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+
+    def messages(self, limit=50):
+        """
+        The `limit` most recent messages, for display.
+        """
+        return self.store.tail(self.session_id, limit)
+
+    def count(self):
+        return self.store.count(self.session_id)
+
+    def add(self, role, content, roll=True):
+        """
+        Appends a message. With `roll=False` the window is left to a later
+        `roll()`, e.g. `roll_in_background()` once a reply has been shown.
+        """
+        self.store.append(self.session_id, role, content)
+        if roll:
+            self.roll()
+
+    def roll_in_background(self):
+        """
+        Runs `roll()` in a daemon thread, so a model call for the summary
+        does not hold up the caller. Returns the thread.
+        """
+        thread = threading.Thread(target=self.roll, name="conversation-roll", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self):
+        self.store.clear(self.session_id)
+
+    def _window(self):
+        summary, through_id = self.store.get_summary(self.session_id)
+        return summary, through_id, self.store.tail(self.session_id, limit=MAX_WINDOW_MESSAGES, after_id=through_id)
+
+    def roll(self):
+        """
+        Folds the oldest unsummarized messages into the summary once they
+        no longer fit in the verbatim window.
+        """
+        summary, through_id, recent = self._window()
+        total = sum(m["tokens"] for m in recent)
+        if total <= self.window_tokens:
+            return
+        folded = []
+        while recent and total > self.window_tokens:
+            message = recent.pop(0)
+            total -= message["tokens"]
+            folded.append(message)
+        with span("conversation_summary", messages=len(folded)) as attrs:
+            summary = self.summarize_fn(summary, folded, self.summary_tokens)
+            # Another roll of the same window may have finished first; keep its summary.
+            attrs["stored"] = self.store.set_summary(self.session_id, summary, folded[-1]["id"], previous_id=through_id)
+
+    def context(self):
+        """
+        Returns the conversation so far as prompt text: the summary of older
+        turns followed by the recent messages verbatim ("" if empty).
+        Messages past the window that are not summarized yet are left out.
+        """
+        summary, _, unsummarized = self._window()
+        recent, total = [], 0
+        for m in reversed(unsummarized):
+            if recent and total + m["tokens"] > self.window_tokens:
+                break
+            recent.insert(0, m)
+            total += m["tokens"]
+        # A single message longer than the window is cut rather than dropped.
+        recent = [dict(m, content=truncate_to_tokens(m["content"], self.window_tokens)) for m in recent]
+        parts = []
+        if summary:
+            parts.append(f"Summary of earlier conversation:\n{summary}")
+        if recent:
+            parts.append(format_messages(recent))
+        return "\n\n".join(parts)
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class GeminiBackend:
+    """
+    Embeds text with the Gemini embedding API.
+    """
+    name = "gemini"
+    remote = True
+    # Gemini's batchEmbedContents accepts at most 100 texts per request.
+    max_batch_size = 100
+
+    def __init__(self, model_name='models/text-embedding-004', embed_fn=None, aembed_fn=None):
+        """
+        `embed_fn` and `aembed_fn` default to `genai.embed_content` and
+        `genai.embed_content_async`; pass stand-ins with the same signatures
+        to run without the API (e.g. in tests).
+        """
+        if embed_fn is None:
+            import google.generativeai as genai
+            from llm_client import configure_genai
+            # Shares the once-per-process SDK setup with the generation client.
+            configure_genai()
+            embed_fn = genai.embed_content
+            aembed_fn = aembed_fn or genai.embed_content_async
+        self.model_name = model_name
+        self.embed_fn = embed_fn
+        self.aembed_fn = aembed_fn
+
+    @staticmethod
+    def _task_args(task_type):
+        # Gemini only accepts a title for document embeddings.
+        if task_type == "retrieval_document":
+            return {"task_type": task_type, "title": "Embedding of text"}
+        return {"task_type": task_type}
+
+    def embed(self, texts, task_type="retrieval_document"):
+        """
+        Embeds a list of texts in a single request.
+        """
+        result = self.embed_fn(model=self.model_name, content=texts, **self._task_args(task_type))
+        return result['embedding']
+
+    async def aembed(self, texts, task_type="retrieval_document"):
+        """
+        Async variant of `embed`. Falls back to running `embed_fn` in a
+        thread when no async function is available.
+        """
+        if self.aembed_fn is None:
+            return await asyncio.to_thread(self.embed, texts, task_type)
+        result = await self.aembed_fn(model=self.model_name, content=texts, **self._task_args(task_type))
+        return result['embedding']
+
+class SentenceTransformerBackend:
+    """
+    Embeds text locally on CPU with sentence-transformers.
+    """
+    name = "local"
+    remote = False
+    max_batch_size = None
+
+    def __init__(self, model_name='all-mpnet-base-v2', batch_size=32, num_threads=None, device="cpu"):
+        # Imported here so the Gemini-only path does not pay for torch.
+        from sentence_transformers import SentenceTransformer
+        import torch
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        print(f"Loading local embedding model: {model_name} ({device})...")
+        self.model = SentenceTransformer(model_name, device=device)
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+    def embed(self, texts, task_type="retrieval_document"):
+        """
+        Embeds texts in length-sorted batches so each batch pads to similar
+        lengths. Returns a float32 array in input order. The model is
+        symmetric, so `task_type` is ignored.
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        dim = self.model.get_sentence_embedding_dimension()
+        output = np.empty((len(texts), dim), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            vectors = self.model.encode(
+                [texts[i] for i in indices],
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            output[indices] = vectors.astype(np.float32, copy=False)
+        return output
+
+    async def aembed(self, texts, task_type="retrieval_document"):
+        """
+        Runs `embed` in a worker thread so inference does not block the event loop.
+        """
+        return await asyncio.to_thread(self.embed, texts, task_type)
+
+def create_backend(name=None, model_name=None, embed_fn=None, aembed_fn=None):
+    """
+    Builds an embedding backend from arguments or, failing that, from the
+    EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE and
+    EMBEDDING_THREADS environment variables.
+    """
+    name = name or os.getenv("EMBEDDING_BACKEND", "gemini")
+    model_name = model_name or os.getenv("EMBEDDING_MODEL")
+
+    if name == "gemini":
+        return GeminiBackend(model_name or 'models/text-embedding-004', embed_fn=embed_fn, aembed_fn=aembed_fn)
+    if name == "local":
+        threads = os.getenv("EMBEDDING_THREADS")
+        return SentenceTransformerBackend(
+            model_name or 'all-mpnet-base-v2',
+            batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "32")),
+            num_threads=int(threads) if threads else None
+        )
+    raise ValueError(f"Unknown embedding backend: {name}")
@@ -0,0 +1,76 @@
+import hashlib
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from sqlite_cache import SQLiteCache
+
+class EmbeddingCache(SQLiteCache):
+    def __init__(self, path="./cache/embeddings.sqlite3", memory_size=2048, max_entries=500000):
+        """
+        Persistent embedding cache.
+        A SQLiteCache whose values are float32 vectors stored as blobs, keyed
+        by a hash of (model_name, task_type, normalized text), with an
+        in-memory LRU in front.
+        """
+        super().__init__(path, max_entries=max_entries)
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+
+    @staticmethod
+    def make_key(model_name, task_type, text):
+        """
+        Builds the cache key. Text is NFC-normalized and whitespace-collapsed
+        so trivially different copies of the same text share an entry.
+        """
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{model_name}|{task_type}|{digest}"
+
+    def _encode(self, vector):
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    def _decode(self, blob):
+        return np.frombuffer(blob, dtype=np.float32)
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """
+        Looks up several keys at once, in memory first. Returns a dict of the keys that were found.
+        """
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+            self.hits += len(keys) - len(missing)
+            for key, vector in super().get_many(missing).items():
+                found[key] = vector
+                self._remember(key, vector)
+        return found
+
+    def set_many(self, items):
+        """
+        Stores (key, vector) pairs and evicts old rows if the cache is over capacity.
+        """
+        items = [(key, np.asarray(vector, dtype=np.float32)) for key, vector in items]
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+            super().set_many(items)
+
+    def stats(self):
+        """
+        Returns hit/miss counters, the hit rate and the in-memory entry count.
+        """
+        return dict(super().stats(), memory_entries=len(self._memory))
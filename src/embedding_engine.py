@@ -1,51 +1,234 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from embedding_backends import create_backend
+from context_builder import estimate_tokens
+from embedding_cache import EmbeddingCache
+from telemetry import cache_result, incr, span
 
-load_dotenv()
+DOCUMENT = "retrieval_document"
+QUERY = "retrieval_query"
+
+def _as_list(vector):
+    return vector.tolist() if hasattr(vector, "tolist") else list(vector)
 
 class EmbeddingEngine:
-    def __init__(self, model_name='models/text-embedding-004'):
+    def __init__(self, model_name=None, embed_fn=None, backend=None, aembed_fn=None,
+                 batch_size=100, max_concurrency=4, max_retries=3, retry_backoff=1.0,
+                 cache=None, use_cache=True, query_cache_size=256):
         """
-        Initializes the embedding model using Gemini.
+        Initializes the embedding model.
+        `backend` is a backend instance or name ("gemini" or "local"); when
+        omitted it is chosen from the EMBEDDING_BACKEND environment variable.
+        `embed_fn` and `aembed_fn` replace `genai.embed_content` and its async
+        variant for the Gemini backend, so the engine can run against a local
+        stand-in.
+        Embeddings are cached on disk unless `use_cache` is False, with
+        documents and queries in separate namespaces. The `query_cache_size`
+        most recent queries are also kept in memory.
         """
-        print(f"Loading embedding model: {model_name}...")
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            print("Warning: GEMINI_API_KEY not found in environment variables.")
-        else:
-            genai.configure(api_key=api_key.strip())
-        self.model_name = model_name
+        if backend is None or isinstance(backend, str):
+            backend = create_backend(backend, model_name=model_name, embed_fn=embed_fn, aembed_fn=aembed_fn)
+        print(f"Loading embedding model: {backend.model_name}...")
+        self.backend = backend
+        self.model_name = backend.model_name
+        if backend.max_batch_size:
+            batch_size = min(batch_size, backend.max_batch_size)
+        self.batch_size = max(1, batch_size)
+        # Local inference is CPU-bound and batches internally, so one worker is enough.
+        self.max_concurrency = max(1, max_concurrency) if backend.remote else 1
+        self.max_retries = max_retries if backend.remote else 0
+        self.retry_backoff = retry_backoff
+        if cache is None and use_cache:
+            cache = EmbeddingCache()
+        self.cache = cache
+        self.query_cache_size = query_cache_size
+        self._query_lru = OrderedDict()
+        self._query_lock = threading.Lock()
         print("Model loaded successfully.")
 
-    def generate_embedding(self, text):
+    def generate_embedding(self, text, task_type=DOCUMENT):
         """
         Generates an embedding for the given text.
         Returns a list of floats.
         """
         if not text or not isinstance(text, str):
             raise ValueError("Input text must be a non-empty string.")
-        
-        result = genai.embed_content(
-            model=self.model_name,
-            content=text,
-            task_type="retrieval_document",
-            title="Embedding of text"
-        )
-        return result['embedding']
+        return self.generate_embeddings_batch([text], task_type=task_type)[0]
+
+    def _query_lru_get(self, text):
+        with self._query_lock:
+            if text in self._query_lru:
+                self._query_lru.move_to_end(text)
+                return self._query_lru[text]
+        return None
+
+    def _query_lru_put(self, text, embedding):
+        with self._query_lock:
+            self._query_lru[text] = embedding
+            self._query_lru.move_to_end(text)
+            while len(self._query_lru) > self.query_cache_size:
+                self._query_lru.popitem(last=False)
+
+    def generate_query_embedding(self, text):
+        """
+        Embeds a search query (task type "retrieval_query").
+        Hot queries are served from an in-memory LRU.
+        """
+        if not text or not isinstance(text, str):
+            raise ValueError("Input text must be a non-empty string.")
+        cached = self._query_lru_get(text)
+        cache_result("query_embedding", cached is not None, cached is None)
+        if cached is not None:
+            return cached
+        embedding = self.generate_embedding(text, task_type=QUERY)
+        self._query_lru_put(text, embedding)
+        return embedding
+
+    def generate_query_embeddings_batch(self, texts):
+        """
+        Embeds several search queries, sending only those not in the
+        in-memory LRU to `generate_embeddings_batch`.
+        """
+        if not texts or not isinstance(texts, list):
+            raise ValueError("Input must be a list of strings.")
+        found = {t: self._query_lru_get(t) for t in texts}
+        pending = [t for t, e in found.items() if e is None]
+        cache_result("query_embedding", len(found) - len(pending), len(pending))
+        if pending:
+            for text, embedding in zip(pending, self.generate_embeddings_batch(pending, task_type=QUERY)):
+                found[text] = embedding
+                self._query_lru_put(text, embedding)
+        return [found[t] for t in texts]
+
+    async def agenerate_query_embedding(self, text):
+        """
+        Async variant of `generate_query_embedding`.
+        """
+        if not text or not isinstance(text, str):
+            raise ValueError("Input text must be a non-empty string.")
+        cached = self._query_lru_get(text)
+        cache_result("query_embedding", cached is not None, cached is None)
+        if cached is not None:
+            return cached
+        embedding = await self.agenerate_embedding(text, task_type=QUERY)
+        self._query_lru_put(text, embedding)
+        return embedding
+
+    async def agenerate_embedding(self, text, task_type=DOCUMENT):
+        """
+        Async variant of `generate_embedding`, using the backend's async call.
+        """
+        if not text or not isinstance(text, str):
+            raise ValueError("Input text must be a non-empty string.")
+
+        key = EmbeddingCache.make_key(self.model_name, task_type, text)
+        with span("embed", task_type=task_type, texts=1) as attrs:
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                cache_result("embedding", cached is not None, cached is None)
+                if cached is not None:
+                    attrs["sent"] = 0
+                    return _as_list(cached)
+
+            attrs["sent"] = 1
+            incr("tokens_total", estimate_tokens(text), stage="embedding")
+            for attempt in range(self.max_retries + 1):
+                try:
+                    incr("embedding_requests_total")
+                    embedding = (await self.backend.aembed([text], task_type=task_type))[0]
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        raise
+                    incr("embedding_retries_total")
+                    delay = self.retry_backoff * (2 ** attempt)
+                    print(f"Embedding failed ({e}). Retrying in {delay:.1f}s...")
+                    await asyncio.sleep(delay)
+
+            if self.cache is not None:
+                self.cache.set(key, embedding)
+            return _as_list(embedding)
+
+    def _embed_chunk(self, chunk, task_type=DOCUMENT):
+        """
+        Embeds one chunk of texts in a single request, retrying with
+        exponential backoff on failure.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                incr("embedding_requests_total")
+                embeddings = self.backend.embed(chunk, task_type=task_type)
+                if len(embeddings) != len(chunk):
+                    raise ValueError(f"Expected {len(chunk)} embeddings, got {len(embeddings)}.")
+                return embeddings
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                incr("embedding_retries_total")
+                delay = self.retry_backoff * (2 ** attempt)
+                print(f"Embedding batch of {len(chunk)} failed ({e}). Retrying in {delay:.1f}s...")
+                time.sleep(delay)
 
-    def generate_embeddings_batch(self, texts):
+    def generate_embeddings_batch(self, texts, task_type=DOCUMENT):
         """
         Generates embeddings for a list of texts.
+        Texts are sent in chunks of `batch_size`, with at most `max_concurrency`
+        chunks in flight. Results are returned in input order; cached texts
+        are not re-sent.
         """
         if not texts or not isinstance(texts, list):
             raise ValueError("Input must be a list of strings.")
-            
-        # Gemini batch embedding might have limits, doing loop for safety or check API
-        # For now, simple loop
+        if not all(text and isinstance(text, str) for text in texts):
+            raise ValueError("Every item must be a non-empty string.")
+
+        with span("embed", task_type=task_type, texts=len(texts)) as attrs:
+            if self.cache is not None:
+                keys = [EmbeddingCache.make_key(self.model_name, task_type, t) for t in texts]
+                found = self.cache.get_many(keys)
+            else:
+                keys = list(texts)
+                found = {}
+
+            # Embed each distinct uncached text once.
+            pending = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in pending:
+                    pending[key] = text
+            if self.cache is not None:
+                cache_result("embedding", len(found), len(pending))
+            attrs["sent"] = len(pending)
+
+            if pending:
+                pending_keys = list(pending)
+                pending_texts = [pending[key] for key in pending_keys]
+                incr("tokens_total", sum(estimate_tokens(t) for t in pending_texts), stage="embedding")
+                new_embeddings = self._embed_texts(pending_texts, task_type)
+                found.update(zip(pending_keys, new_embeddings))
+                if self.cache is not None:
+                    self.cache.set_many(zip(pending_keys, new_embeddings))
+
+            return [_as_list(found[key]) for key in keys]
+
+    def _embed_texts(self, texts, task_type=DOCUMENT):
+        """
+        Sends `texts` to the backend in chunks with bounded concurrency, preserving order.
+        """
+        if not self.backend.remote:
+            # The local backend does its own length-sorted batching.
+            return list(self._embed_chunk(texts, task_type))
+
+        chunks = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        workers = min(self.max_concurrency, len(chunks))
+
         embeddings = []
-        for text in texts:
-            embeddings.append(self.generate_embedding(text))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() yields in submission order, so output lines up with `texts`.
+            for chunk_embeddings in pool.map(partial(self._embed_chunk, task_type=task_type), chunks):
+                embeddings.extend(chunk_embeddings)
         return embeddings
 
 if __name__ == "__main__":
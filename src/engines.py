@@ -0,0 +1,85 @@
+import importlib
+import threading
+from telemetry import span
+
+class LazyEngine:
+    def __init__(self, name, factory):
+        """
+        Builds an engine with `factory` on the first `get()` and reuses it.
+        Concurrent callers wait for a single build; a failed build is
+        retried on the next call.
+        """
+        self.name = name
+        self._factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._value is not None
+
+    def get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    with span("engine_load", engine=self.name):
+                        self._value = self._factory()
+        return self._value
+
+class Engines:
+    # Third-party modules that are slow to import and needed on first upload or export.
+    PRELOAD_MODULES = ("fitz", "fpdf")
+
+    def __init__(self, model=None, embedding_engine=None, read_only=False):
+        """
+        The app's engines, each constructed (with its heavy imports) on
+        first use rather than at startup. `warm_up` builds them in the
+        background so the first request does not pay for it either.
+        `model` and `embedding_engine` replace the Gemini-backed defaults
+        (e.g. with fakes for load tests). With `read_only` the vector store
+        is opened without write access, for serving processes that share it.
+        """
+        self.model = model
+        self.embedding_engine = embedding_engine
+        self.read_only = read_only
+        self.rag = LazyEngine("rag", self._build_rag)
+        self.roadmap_engine = LazyEngine("roadmap", self._build_roadmap_engine)
+        self.matcher = LazyEngine("matcher", self._build_matcher)
+
+    def _build_rag(self):
+        from rag_pipeline import RAGPipeline
+        from vector_db import create_vector_db
+        vector_db = create_vector_db(read_only=True) if self.read_only else None
+        return RAGPipeline(vector_db=vector_db, embedding_engine=self.embedding_engine, model=self.model)
+
+    def _build_roadmap_engine(self):
+        from roadmap_engine import RoadmapEngine
+        return RoadmapEngine(model=self.model)
+
+    def _build_matcher(self):
+        from career_matcher import CareerMatcher
+        rag = self.rag.get()
+        return CareerMatcher(rag.embedding_engine, rag.vector_db.skill_index_path)
+
+    def warm_up(self):
+        """
+        Imports the slow modules and builds every engine in a daemon thread.
+        Failures are printed and left for the first real use to retry.
+        Returns the thread.
+        """
+        def run():
+            for module in self.PRELOAD_MODULES:
+                try:
+                    importlib.import_module(module)
+                except ImportError as e:
+                    print(f"Warm-up: could not import {module}: {e}")
+            for engine in (self.rag, self.roadmap_engine, self.matcher):
+                try:
+                    engine.get()
+                except Exception as e:
+                    print(f"Warm-up: building {engine.name} failed: {e}")
+            print("Warm-up complete.")
+
+        thread = threading.Thread(target=run, name="engine-warm-up", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import random
+import time
+
+import numpy as np
+
+class FakeAPIError(Exception):
+    """
+    Raised by the fakes to simulate a failed API call.
+    The message mimics Gemini's quota error.
+    """
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class _FaultInjector:
+    def __init__(self, latency, jitter, failure_rate, seed):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    def _delay(self):
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _maybe_fail(self):
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise FakeAPIError("429 Resource has been exhausted (fake)")
+
+class FakeGenerativeModel(_FaultInjector):
+    """
+    Local stand-in for `genai.GenerativeModel` with configurable latency
+    (plus/minus `jitter` seconds) and failure rate.
+    Used to benchmark and exercise the pipeline without calling Gemini.
+    With `stream=True` the reply is split into `chunks` pieces, the first
+    arriving after `latency` and the rest spaced by `chunk_latency`.
+    """
+    def __init__(self, latency=0.2, reply="This is a fake answer.", chunks=4, chunk_latency=0.02,
+                 jitter=0.0, failure_rate=0.0, seed=None):
+        super().__init__(latency, jitter, failure_rate, seed)
+        self.reply = reply
+        self.chunks = chunks
+        self.chunk_latency = chunk_latency
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream()
+        time.sleep(self._delay())
+        self._maybe_fail()
+        return FakeResponse(self.reply)
+
+    def _stream(self):
+        time.sleep(self._delay())
+        self._maybe_fail()
+        size = max(1, -(-len(self.reply) // self.chunks))
+        for i in range(0, len(self.reply), size):
+            if i:
+                time.sleep(self.chunk_latency)
+            yield FakeResponse(self.reply[i:i + size])
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(self._delay())
+        self._maybe_fail()
+        return FakeResponse(self.reply)
+
+def _fake_vector(text, dim):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+class FakeEmbedder(_FaultInjector):
+    """
+    Local stand-in for `genai.embed_content` and `genai.embed_content_async`.
+    Returns deterministic pseudo-random unit vectors derived from the text,
+    with configurable latency per call and failure rate.
+    """
+    def __init__(self, latency=0.05, dim=768, jitter=0.0, failure_rate=0.0, seed=None):
+        super().__init__(latency, jitter, failure_rate, seed)
+        self.dim = dim
+
+    def _result(self, content):
+        if isinstance(content, list):
+            return {'embedding': [_fake_vector(text, self.dim) for text in content]}
+        return {'embedding': _fake_vector(content, self.dim)}
+
+    def embed_content(self, model, content, task_type=None, title=None):
+        time.sleep(self._delay())
+        self._maybe_fail()
+        return self._result(content)
+
+    async def embed_content_async(self, model, content, task_type=None, title=None):
+        await asyncio.sleep(self._delay())
+        self._maybe_fail()
+        return self._result(content)
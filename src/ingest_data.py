@@ -1,51 +1,141 @@
-from vector_db import VectorDB
+import argparse
+import contextlib
+import csv
+import hashlib
+import json
+import os
+from bm25_index import BM25Index
+from career_matcher import load_skill_index, update_skill_index
+from vector_db import create_vector_db
 from embedding_engine import EmbeddingEngine
+from resume_rules import match_skills
 
-def ingest_dummy_data():
-    """
-    Ingests dummy career data into the Vector DB.
-    """
-    db = VectorDB()
-    engine = EmbeddingEngine()
-    
-    careers = [
-        {
-            "role": "Data Scientist",
-            "description": "Analyze large datasets to derive insights. Requires Python, SQL, Machine Learning, and Statistics.",
-            "category": "Data"
-        },
-        {
-            "role": "Frontend Developer",
-            "description": "Build user interfaces for web applications. Requires HTML, CSS, JavaScript, React, and responsive design.",
-            "category": "Web Development"
-        },
-        {
-            "role": "Backend Developer",
-            "description": "Build server-side logic and APIs. Requires Python (Django/Flask), Node.js, Databases (SQL/NoSQL).",
-            "category": "Web Development"
-        },
-        {
-            "role": "DevOps Engineer",
-            "description": "Manage infrastructure and deployment pipelines. Requires Docker, Kubernetes, CI/CD, and Cloud platforms (AWS/Azure).",
-            "category": "Infrastructure"
-        },
-        {
-            "role": "Product Manager",
-            "description": "Define product vision and strategy. Requires communication, prioritization, and understanding of user needs.",
-            "category": "Management"
-        }
-    ]
-    
-    documents = [c["description"] for c in careers]
-    metadatas = [{"role": c["role"], "category": c["category"]} for c in careers]
-    ids = [str(i) for i in range(len(careers))]
-    
-    print("Generating embeddings...")
-    embeddings = engine.generate_embeddings_batch(documents)
-    
-    print("Adding to Vector DB...")
-    db.add_documents_with_embeddings(documents, embeddings, metadatas, ids)
-    print("Ingestion complete.")
+DEFAULT_CATALOG = os.path.join(os.path.dirname(__file__), "..", "data", "careers.jsonl")
+
+def read_career_records(path):
+    """
+    Streams career records from a JSONL or CSV file.
+    Each record needs `role` and `description`; `category` is optional.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield row
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+def record_id(record, model_name=""):
+    """
+    Derives a stable id from the record content and embedding model, so
+    unchanged records keep their id across runs while edited records, or
+    records embedded by a different model, get a new one.
+    """
+    payload = json.dumps(
+        [model_name, record["role"], record["description"], record.get("category", "")],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+def record_metadata(record):
+    return {"role": record["role"], "category": record.get("category", "")}
+
+def sync_skill_index(db, engine, live_ids, updates, batch_size=100):
+    """
+    Applies `updates` (id, role, category, skills) to the store's skill
+    index and drops careers not in `live_ids`. Live careers the index is
+    missing (e.g. on its first build) are read back from the store in
+    batches rather than from the catalog.
+    """
+    index = load_skill_index(db.skill_index_path)
+    indexed = set(index["ids"]) if index is not None else set()
+    updated = {career[0] for career in updates}
+    missing = list(live_ids - indexed - updated)
+    for i in range(0, len(missing), batch_size):
+        found = db.get_by_ids(missing[i:i + batch_size])
+        updates.extend(
+            (rid, (m or {}).get("role", ""), (m or {}).get("category", ""), match_skills(d))
+            for rid, d, m in zip(found["ids"], found["documents"], found["metadatas"])
+        )
+    update_skill_index(db.skill_index_path, engine, updates, deleted_ids=indexed - live_ids, rebuild=index is None)
+
+def ingest_careers(path, db=None, engine=None, batch_size=100, backend=None):
+    """
+    Syncs the Vector DB with the catalog at `path`.
+    Only new or changed records are embedded and upserted, in batches of
+    `batch_size`; records no longer in the catalog are deleted. The BM25
+    keyword index next to the store and the career skill index are
+    updated the same way: only changed records have their skills extracted.
+    """
+    db = db if db else create_vector_db()
+    engine = engine if engine else EmbeddingEngine(backend=backend)
+
+    bm25 = BM25Index(db.bm25_path)
+    existing_ids = db.get_ids()
+    seen_ids = set()
+    # (id, role, category, skills) of upserted records, for the skill index.
+    skill_updates = []
+    stats = {"unchanged": 0, "upserted": 0, "deleted": 0, "skipped": 0}
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        documents = [r["description"] for _, r in batch]
+        metadatas = [record_metadata(r) for _, r in batch]
+        ids = [rid for rid, _ in batch]
+        embeddings = engine.generate_embeddings_batch(documents)
+        db.upsert_documents_with_embeddings(documents, embeddings, metadatas, ids)
+        bm25.upsert(ids, documents, metadatas)
+        skill_updates.extend((rid, r["role"], r.get("category", ""), match_skills(r["description"])) for rid, r in batch)
+        stats["upserted"] += len(batch)
+        batch.clear()
+
+    # Stores that support it defer disk writes until every batch is in.
+    bulk = db.bulk_write() if hasattr(db, "bulk_write") else contextlib.nullcontext()
+    with bulk:
+        for record in read_career_records(path):
+            if not record.get("role") or not record.get("description"):
+                stats["skipped"] += 1
+                continue
+            rid = record_id(record, engine.model_name)
+            if rid in seen_ids:
+                continue
+            seen_ids.add(rid)
+            if rid in existing_ids:
+                stats["unchanged"] += 1
+                # Backfill the keyword index for stores ingested before it existed.
+                if rid not in bm25:
+                    bm25.upsert([rid], [record["description"]], [record_metadata(record)])
+                continue
+            batch.append((rid, record))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+        # Delete after upserting so the collection is never missing live records.
+        stale_ids = list(existing_ids - seen_ids)
+        for i in range(0, len(stale_ids), batch_size):
+            db.delete(stale_ids[i:i + batch_size])
+    bm25.delete(stale_ids)
+    bm25.save()
+    stats["deleted"] = len(stale_ids)
+
+    sync_skill_index(db, engine, seen_ids, skill_updates, batch_size)
+
+    if engine.cache is not None:
+        print(f"Embedding cache: {engine.cache.stats()}")
+    print(f"Ingestion complete: {stats}")
+    return stats
 
 if __name__ == "__main__":
-    ingest_dummy_data()
+    parser = argparse.ArgumentParser(description="Incrementally ingest a career catalog into the Vector DB.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_CATALOG, help="Career catalog (.jsonl or .csv).")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--backend", choices=["gemini", "local"], default=None,
+                        help="Embedding backend (defaults to EMBEDDING_BACKEND).")
+    args = parser.parse_args()
+    ingest_careers(args.path, batch_size=args.batch_size, backend=args.backend)
@@ -0,0 +1,323 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from dotenv import load_dotenv
+from context_builder import estimate_tokens
+from telemetry import incr, set_gauge
+
+load_dotenv()
+
+# HTTP statuses worth retrying: rate limited or a transient server error.
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_STATUS_RE = re.compile(r"^\s*(\d{3})\b")
+
+def is_retryable(error):
+    """
+    True for quota (429) and transient server (5xx) errors. Google API errors
+    carry the HTTP status in `code`; other clients put it at the start of the message.
+    """
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS
+    match = _STATUS_RE.match(str(error))
+    return bool(match) and int(match.group(1)) in RETRYABLE_STATUS
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class RateLimiter:
+    def __init__(self, rpm=None, tpm=None):
+        """
+        Token-bucket limits on requests per minute and tokens per minute.
+        A limit of None or 0 is unlimited. Both buckets start full, so a
+        burst up to the per-minute limit goes through at once.
+        """
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens):
+        """
+        Takes one request and `tokens` tokens if both are available and
+        returns 0; otherwise takes nothing and returns the seconds to wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self._requests:
+                self._requests.refill(now)
+                wait = max(wait, (1 - self._requests.tokens) / self._requests.rate)
+            if self._tokens:
+                self._tokens.refill(now)
+                # A prompt larger than the whole budget waits for a full bucket, not forever.
+                tokens = min(tokens, self._tokens.capacity)
+                wait = max(wait, (tokens - self._tokens.tokens) / self._tokens.rate)
+            if wait > 0:
+                return wait
+            if self._requests:
+                self._requests.tokens -= 1
+            if self._tokens:
+                self._tokens.tokens -= tokens
+            return 0.0
+
+    def debit(self, tokens):
+        """
+        Charges tokens known only after the call (the response) against the TPM budget.
+        """
+        if self._tokens:
+            with self._lock:
+                self._tokens.refill(time.monotonic())
+                self._tokens.tokens -= tokens
+
+class LLMClient:
+    def __init__(self, model, model_name=None, rpm=None, tpm=None, max_retries=4,
+                 retry_backoff=1.0, max_backoff=30.0):
+        """
+        Wraps a Gemini `GenerativeModel` (or a stand-in with the same methods)
+        with rate limiting, retries and request coalescing.
+        Calls wait for the `rpm`/`tpm` token buckets instead of failing with
+        429s, retry 429/5xx errors up to `max_retries` times with jittered
+        exponential backoff, and identical prompts already in flight share
+        one call. Queue depth and in-flight calls are exported as gauges.
+        """
+        self.model = model
+        self.model_name = model_name or getattr(model, "model_name", type(model).__name__)
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self._inflight = {}   # prompt key -> concurrent.futures.Future
+        self._ainflight = {}  # (event loop id, prompt key) -> asyncio.Task
+        self._queued = 0
+        self._active = 0
+
+    def stats(self):
+        return {"model": self.model_name, "queued": self._queued, "in_flight": self._active}
+
+    def _key(self, prompt):
+        return hashlib.sha256(f"{self.model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _track(self, queued=0, active=0):
+        with self._lock:
+            self._queued += queued
+            self._active += active
+            set_gauge("llm_queue_depth", self._queued, model=self.model_name)
+            set_gauge("llm_in_flight", self._active, model=self.model_name)
+
+    def _backoff(self, attempt):
+        # Full jitter spreads out retries from callers that failed together.
+        return self._random.uniform(0, min(self.max_backoff, self.retry_backoff * (2 ** attempt)))
+
+    def _retry_delay(self, attempt, error):
+        if attempt == self.max_retries or not is_retryable(error):
+            return None
+        delay = self._backoff(attempt)
+        incr("llm_retries_total", model=self.model_name)
+        print(f"LLM call failed ({error}). Retrying in {delay:.1f}s...")
+        return delay
+
+    def _acquire(self, tokens):
+        wait = self.limiter.reserve(tokens)
+        if not wait:
+            return
+        self._track(queued=1)
+        start = time.perf_counter()
+        try:
+            while wait:
+                time.sleep(wait)
+                wait = self.limiter.reserve(tokens)
+        finally:
+            self._track(queued=-1)
+            incr("llm_throttle_seconds_total", time.perf_counter() - start, model=self.model_name)
+
+    async def _aacquire(self, tokens):
+        wait = self.limiter.reserve(tokens)
+        if not wait:
+            return
+        self._track(queued=1)
+        start = time.perf_counter()
+        try:
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self.limiter.reserve(tokens)
+        finally:
+            self._track(queued=-1)
+            incr("llm_throttle_seconds_total", time.perf_counter() - start, model=self.model_name)
+
+    def _call(self, prompt):
+        tokens = estimate_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            self._acquire(tokens)
+            self._track(active=1)
+            try:
+                incr("llm_requests_total", model=self.model_name)
+                text = self.model.generate_content(prompt).text
+                self.limiter.debit(estimate_tokens(text))
+                return text
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                self._track(active=-1)
+            time.sleep(delay)
+
+    def generate(self, prompt):
+        """
+        Returns the model's text for `prompt`. Concurrent identical prompts
+        are sent once and share the result (or the error).
+        """
+        key = self._key(prompt)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+        if not leader:
+            incr("llm_coalesced_total", model=self.model_name)
+            return future.result()
+        try:
+            text = self._call(prompt)
+            future.set_result(text)
+            return text
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def generate_stream(self, prompt):
+        """
+        Yields the model's text in chunks as they arrive. A failure before
+        the first chunk is retried like `generate`; streams are not coalesced.
+        """
+        tokens = estimate_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            self._acquire(tokens)
+            self._track(active=1)
+            received = []
+            try:
+                incr("llm_requests_total", model=self.model_name)
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if chunk.text:
+                        received.append(chunk.text)
+                        yield chunk.text
+                self.limiter.debit(estimate_tokens("".join(received)))
+                return
+            except Exception as e:
+                # Text already shown to the caller cannot be taken back.
+                delay = None if received else self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                self._track(active=-1)
+            time.sleep(delay)
+
+    async def _acall(self, prompt):
+        tokens = estimate_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            await self._aacquire(tokens)
+            self._track(active=1)
+            try:
+                incr("llm_requests_total", model=self.model_name)
+                text = (await self.model.generate_content_async(prompt)).text
+                self.limiter.debit(estimate_tokens(text))
+                return text
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                self._track(active=-1)
+            await asyncio.sleep(delay)
+
+    async def agenerate(self, prompt):
+        """
+        Async variant of `generate`, coalescing identical prompts per event loop.
+        The call runs in its own task, so a caller that times out or is
+        cancelled does not cancel it for the others waiting on the same prompt.
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), self._key(prompt))
+        with self._lock:
+            task = self._ainflight.get(key)
+            if task is None:
+                task = self._ainflight[key] = loop.create_task(self._acall(prompt))
+                task.add_done_callback(lambda t: self._afinish(key, t))
+                coalesced = False
+            else:
+                coalesced = True
+        if coalesced:
+            incr("llm_coalesced_total", model=self.model_name)
+        # shield(): cancelling this caller must not cancel the shared call.
+        return await asyncio.shield(task)
+
+    def _afinish(self, key, task):
+        with self._lock:
+            if self._ainflight.get(key) is task:
+                del self._ainflight[key]
+        # Mark errors as retrieved when every caller had already given up.
+        if not task.cancelled():
+            task.exception()
+
+_clients = {}
+_clients_lock = threading.Lock()
+_configured = False
+
+def configure_genai():
+    """
+    Configures the Gemini SDK once per process and returns the module,
+    or None when GEMINI_API_KEY is not set.
+    """
+    global _configured
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("Warning: GEMINI_API_KEY not found in environment variables.")
+        return None
+    # Imported on demand: the SDK is slow to load and unused with fake models.
+    import google.generativeai as genai
+    with _clients_lock:
+        if not _configured:
+            genai.configure(api_key=api_key.strip())
+            _configured = True
+    return genai
+
+def get_llm_client(model_name):
+    """
+    Returns the process-wide client for the Gemini model `model_name`, or
+    None without an API key. Callers of the same model share its rate limits,
+    which come from LLM_RPM, LLM_TPM and LLM_MAX_RETRIES (defaults 60, 1000000, 4).
+    """
+    with _clients_lock:
+        client = _clients.get(model_name)
+    if client is not None:
+        return client
+    genai = configure_genai()
+    if genai is None:
+        return None
+    with _clients_lock:
+        if model_name not in _clients:
+            _clients[model_name] = LLMClient(
+                genai.GenerativeModel(model_name),
+                model_name=model_name,
+                rpm=int(os.getenv("LLM_RPM", "60")),
+                tpm=int(os.getenv("LLM_TPM", "1000000")),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+            )
+        return _clients[model_name]
@@ -0,0 +1,303 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from telemetry import traced
+
+class _Snapshot:
+    """
+    One version of the index. Writes publish a new snapshot instead of
+    mutating this one, so a reader that took a reference always sees
+    vectors, ids, documents and metadata that belong together.
+    """
+    def __init__(self, vectors, ids, documents, metadatas):
+        self.vectors = vectors
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        # Derived lazily by readers; recomputing them in a race is harmless.
+        self.positions = None
+        self.masks = {}
+
+    def rows(self):
+        """
+        Returns a mutable copy of the rows for `NumpyVectorDB._upsert_rows`.
+        """
+        return {
+            "vectors": [np.array(self.vectors)] if len(self.ids) else [],
+            "ids": list(self.ids),
+            "documents": list(self.documents),
+            "metadatas": list(self.metadatas),
+            "position": {doc_id: i for i, doc_id in enumerate(self.ids)},
+        }
+
+class NumpyVectorDB:
+    def __init__(self, collection_name="career_path_gpt", persist_directory="./numpy_db", read_only=False):
+        """
+        In-process vector index with VectorDB's pre-computed-embedding
+        interface (it has no embedding function of its own).
+        Normalized float32 vectors live in a memory-mapped .npy file and
+        documents/metadata in a JSON file next to it. Nothing is read until
+        the first query or write.
+        With `read_only`, writes raise PermissionError; processes opening the
+        same index this way share its vectors through the OS page cache.
+        """
+        if not read_only and not os.path.exists(persist_directory):
+            os.makedirs(persist_directory)
+
+        self.collection_name = collection_name
+        self.read_only = read_only
+        self.vectors_path = os.path.join(persist_directory, f"{collection_name}.vectors.npy")
+        self.meta_path = os.path.join(persist_directory, f"{collection_name}.meta.json")
+        # Keyword and skill indexes kept in sync by ingest_data.
+        self.bm25_path = os.path.join(persist_directory, f"{collection_name}.bm25.json")
+        self.skill_index_path = os.path.join(persist_directory, f"{collection_name}.skills.npz")
+        self._index = None
+        self._bulk = None
+        self._lock = threading.Lock()
+        print(f"Using NumPy vector index: {collection_name}" + (" (read-only)" if read_only else ""))
+
+    def _check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"Vector index {self.collection_name} is opened read-only.")
+
+    def _load(self):
+        """
+        Returns the current snapshot, reading it from disk the first time.
+        """
+        index = self._index
+        if index is not None:
+            return index
+        with self._lock:
+            if self._index is None:
+                if os.path.exists(self.meta_path):
+                    with open(self.meta_path, encoding="utf-8") as f:
+                        meta = json.load(f)
+                    self._index = _Snapshot(
+                        np.load(self.vectors_path, mmap_mode="r"),
+                        meta["ids"], meta["documents"], meta["metadatas"]
+                    )
+                else:
+                    self._index = _Snapshot(np.empty((0, 0), dtype=np.float32), [], [], [])
+            return self._index
+
+    def _save(self, vectors, ids, documents, metadatas):
+        # Write to temp files and swap them in, so readers never see a partial index.
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        tmp_meta = self.meta_path + ".tmp"
+        np.save(tmp_vectors, vectors)
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "documents": documents, "metadatas": metadatas}, f)
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_meta, self.meta_path)
+        # Publishing is a single assignment; queries in flight keep the old snapshot.
+        self._index = _Snapshot(np.load(self.vectors_path, mmap_mode="r"), ids, documents, metadatas)
+
+    @staticmethod
+    def _normalize(embeddings):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_documents_with_embeddings(self, documents, embeddings, metadatas, ids):
+        """
+        Adds documents with pre-computed embeddings.
+        """
+        duplicates = set(ids) & set(self._load().ids)
+        if duplicates:
+            raise ValueError(f"Ids already exist: {sorted(duplicates)[:5]}")
+        self.upsert_documents_with_embeddings(documents, embeddings, metadatas, ids)
+
+    @contextmanager
+    def bulk_write(self):
+        """
+        Defers writing the index to disk until the block exits, so a large
+        ingest does not rewrite the vector file once per batch. Upserts and
+        deletes inside the block are applied together on exit; queries see
+        the index as it was before the block. If the block raises, nothing
+        is written.
+        """
+        self._check_writable()
+        self._load()
+        with self._lock:
+            self._bulk = dict(self._index.rows(), deleted=set())
+        try:
+            yield self
+        except BaseException:
+            # A failed block leaves the index on disk untouched.
+            with self._lock:
+                self._bulk = None
+            raise
+        else:
+            with self._lock:
+                bulk, self._bulk = self._bulk, None
+                if bulk["vectors"]:
+                    vectors = np.vstack(bulk["vectors"])
+                    keep = [i for i, doc_id in enumerate(bulk["ids"]) if doc_id not in bulk["deleted"]]
+                    if len(keep) < len(bulk["ids"]):
+                        vectors = vectors[keep]
+                    self._save(
+                        vectors,
+                        [bulk["ids"][i] for i in keep],
+                        [bulk["documents"][i] for i in keep],
+                        [bulk["metadatas"][i] for i in keep]
+                    )
+
+    @traced("vector_upsert")
+    def upsert_documents_with_embeddings(self, documents, embeddings, metadatas, ids):
+        """
+        Inserts or replaces documents with pre-computed embeddings.
+        """
+        self._check_writable()
+        self._load()
+        new_vectors = self._normalize(embeddings)
+        with self._lock:
+            if self._bulk is not None:
+                self._bulk["deleted"].difference_update(ids)
+                self._upsert_rows(self._bulk, documents, new_vectors, metadatas, ids)
+            else:
+                rows = self._index.rows()
+                self._upsert_rows(rows, documents, new_vectors, metadatas, ids)
+                self._save(np.vstack(rows["vectors"]), rows["ids"], rows["documents"], rows["metadatas"])
+        print(f"Upserted {len(documents)} documents with embeddings to the index.")
+
+    @staticmethod
+    def _upsert_rows(rows, documents, new_vectors, metadatas, ids):
+        """
+        Applies an upsert to in-memory rows whose vectors are held as a list
+        of row blocks, so appends never copy existing vectors.
+        """
+        appended = []
+        for i, doc_id in enumerate(ids):
+            row = rows["position"].get(doc_id)
+            if row is None:
+                rows["position"][doc_id] = len(rows["ids"])
+                rows["ids"].append(doc_id)
+                rows["documents"].append(documents[i])
+                rows["metadatas"].append(metadatas[i])
+                appended.append(i)
+                continue
+            rows["documents"][row], rows["metadatas"][row] = documents[i], metadatas[i]
+            # Locate the block that holds this row and overwrite it in place.
+            for block in rows["vectors"]:
+                if row < len(block):
+                    block[row] = new_vectors[i]
+                    break
+                row -= len(block)
+        if appended:
+            rows["vectors"].append(new_vectors[appended])
+
+    def get_ids(self, page_size=None):
+        """
+        Returns the set of all document ids in the index.
+        """
+        return set(self._load().ids)
+
+    @traced("vector_delete")
+    def delete(self, ids):
+        """
+        Deletes documents by id.
+        """
+        self._check_writable()
+        if not ids:
+            return
+        self._load()
+        with self._lock:
+            if self._bulk is not None:
+                self._bulk["deleted"].update(ids)
+                print(f"Deleted {len(ids)} documents from the index.")
+                return
+            index = self._index
+            doomed = set(ids)
+            keep = [i for i, doc_id in enumerate(index.ids) if doc_id not in doomed]
+            self._save(
+                np.array(index.vectors[keep]),
+                [index.ids[i] for i in keep],
+                [index.documents[i] for i in keep],
+                [index.metadatas[i] for i in keep]
+            )
+        print(f"Deleted {len(ids)} documents from the index.")
+
+    @staticmethod
+    def _mask(index, where):
+        """
+        Returns a boolean row mask for an equality filter such as
+        {"category": "Data"}. Per-value masks are computed once per snapshot.
+        """
+        mask = np.ones(len(index.ids), dtype=bool)
+        for field, value in where.items():
+            key = (field, value)
+            if key not in index.masks:
+                index.masks[key] = np.fromiter(
+                    ((m or {}).get(field) == value for m in index.metadatas),
+                    dtype=bool, count=len(index.ids)
+                )
+            mask &= index.masks[key]
+        return mask
+
+    @traced("vector_get")
+    def get_by_ids(self, ids):
+        """
+        Returns documents and metadatas for `ids`, in the order given.
+        Unknown ids are skipped.
+        """
+        index = self._load()
+        if index.positions is None:
+            index.positions = {doc_id: i for i, doc_id in enumerate(index.ids)}
+        rows = [index.positions[i] for i in ids if i in index.positions]
+        return {
+            "ids": [index.ids[r] for r in rows],
+            "documents": [index.documents[r] for r in rows],
+            "metadatas": [index.metadatas[r] for r in rows],
+        }
+
+    def query_by_embedding(self, query_embedding, n_results=5, where=None):
+        """
+        Exact top-k search by cosine similarity with an optional metadata
+        equality filter. Returns results in Chroma's shape, with squared L2
+        distances between the normalized vectors.
+        """
+        return self.query_by_embeddings([query_embedding], n_results=n_results, where=where)[0]
+
+    @traced("vector_query")
+    def query_by_embeddings(self, query_embeddings, n_results=5, where=None):
+        """
+        Batched variant of `query_by_embedding`: scores every query with one
+        matrix product and returns one Chroma-shaped result per query.
+        """
+        index = self._load()
+        empty = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]], "embeddings": None}
+        if not index.ids:
+            return [dict(empty) for _ in query_embeddings]
+
+        queries = self._normalize(query_embeddings)
+        scores = queries @ index.vectors.T
+        if where:
+            mask = self._mask(index, where)
+            scores = np.where(mask[None, :], scores, -np.inf)
+            available = int(mask.sum())
+        else:
+            available = len(index.ids)
+
+        k = min(n_results, available)
+        if k == 0:
+            return [dict(empty) for _ in query_embeddings]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        rows = np.arange(len(queries))[:, None]
+        top = np.take_along_axis(top, np.argsort(-scores[rows, top], axis=1), axis=1)
+
+        results = []
+        for q, indices in enumerate(top):
+            results.append({
+                "ids": [[index.ids[i] for i in indices]],
+                "documents": [[index.documents[i] for i in indices]],
+                "metadatas": [[index.metadatas[i] for i in indices]],
+                "distances": [[float(2.0 - 2.0 * scores[q, i]) for i in indices]],
+                "embeddings": None,
+            })
+        return results
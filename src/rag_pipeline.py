@@ -1,62 +1,346 @@
+import asyncio
 import os
-import google.generativeai as genai
+import threading
+import time
+import weakref
 from dotenv import load_dotenv
-from vector_db import VectorDB
+from vector_db import create_vector_db
+from bm25_index import BM25Index
 from embedding_engine import EmbeddingEngine
+from llm_client import LLMClient, get_llm_client
+from context_builder import build_context, estimate_tokens
+from semantic_cache import SemanticCache
+from telemetry import cache_result, incr, span, span_attributes, traced
 
 load_dotenv()
 
+MODEL_NAME = 'gemini-flash-latest'
+
+class ErrorChunk(str):
+    """
+    A streamed chunk reporting a failure. It renders like any other text,
+    but lets consumers tell a failed stream from a complete answer.
+    """
+
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper.
+RRF_K = 60
+
 class RAGPipeline:
-    def __init__(self, vector_db=None, embedding_engine=None):
+    def __init__(self, vector_db=None, embedding_engine=None, model=None,
+                 max_concurrency=16, retrieve_timeout=10.0, generate_timeout=60.0,
+                 semantic_cache=None, use_semantic_cache=True, context_budget=800,
+                 retrieval_mode=None, bm25_index=None, candidate_multiplier=2):
         """
         Initializes the RAG pipeline.
+        `model` replaces the Gemini model (e.g. with a local fake for benchmarks);
+        it may be an `LLMClient`, otherwise it is wrapped in one without rate limits.
+        The async API shares a limit of `max_concurrency` in-flight stages and
+        applies per-stage timeouts in seconds.
+        Answers are reused for near-duplicate queries unless `use_semantic_cache` is False.
+        Retrieved context is capped at `context_budget` tokens.
+        `retrieval_mode` is "vector" or "hybrid" (BM25 fused with vector
+        search); it defaults to the RETRIEVAL_MODE environment variable, else "hybrid".
+        Hybrid search fetches `candidate_multiplier` * n_results candidates per source.
         """
-        self.vector_db = vector_db if vector_db else VectorDB()
+        self.vector_db = vector_db if vector_db else create_vector_db()
         self.embedding_engine = embedding_engine if embedding_engine else EmbeddingEngine()
-        
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            print("Warning: GEMINI_API_KEY not found in environment variables.")
+        self.retrieve_timeout = retrieve_timeout
+        self.generate_timeout = generate_timeout
+        self.context_budget = context_budget
+        self.max_concurrency = max_concurrency
+        # One semaphore per event loop: asyncio primitives are bound to the loop that first uses them.
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
+        if semantic_cache is None and use_semantic_cache:
+            semantic_cache = SemanticCache()
+        self.semantic_cache = semantic_cache
+        self.retrieval_mode = retrieval_mode or os.getenv("RETRIEVAL_MODE", "hybrid")
+        if bm25_index is None and self.retrieval_mode == "hybrid" and hasattr(self.vector_db, "bm25_path"):
+            bm25_index = BM25Index(self.vector_db.bm25_path)
+        self.bm25_index = bm25_index
+        self.candidate_multiplier = candidate_multiplier
+
+        if model is None:
+            self.llm = get_llm_client(MODEL_NAME)
         else:
-            genai.configure(api_key=api_key.strip())
-            self.model = genai.GenerativeModel('gemini-flash-latest')
+            self.llm = model if isinstance(model, LLMClient) else LLMClient(model)
 
-    def retrieve_relevant_careers(self, query_text, n_results=3):
+    def retrieve_relevant_careers(self, query_text, n_results=3, where=None):
         """
         Retrieves relevant career paths from the Vector DB.
+        `where` filters on metadata equality, e.g. {"category": "Data"}.
         """
-        # Generate embedding for the query
-        query_embedding = self.embedding_engine.generate_embedding(query_text)
-        
-        # Query the database
-        results = self.vector_db.query_by_embedding(query_embedding, n_results=n_results)
+        _, results = self._retrieve(query_text, n_results, where)
         return results
 
-    def generate_response(self, context, query):
+    def retrieve_many(self, query_texts, n_results=3, where=None):
         """
-        Generates a response using Gemini based on the retrieved context.
+        Retrieves careers for several queries at once: the queries are
+        embedded in one batch and searched with one vector DB call.
+        Returns one result per query, in input order.
         """
-        if not hasattr(self, 'model'):
-            return "Error: Gemini model not initialized. Check API Key."
+        if not query_texts:
+            return []
+        query_texts = list(query_texts)
+        with span("retrieve", queries=len(query_texts)):
+            query_embeddings = self.embedding_engine.generate_query_embeddings_batch(query_texts)
+            if not self._use_hybrid():
+                return self.vector_db.query_by_embeddings(query_embeddings, n_results=n_results, where=where)
+            fetch = n_results * self.candidate_multiplier
+            candidates = self.vector_db.query_by_embeddings(query_embeddings, n_results=fetch, where=where)
+            with span("bm25_search", queries=len(query_texts)):
+                keyword = [self.bm25_index.search(text, fetch, where=where) for text in query_texts]
+            return [self._fuse(vector, hits, n_results) for vector, hits in zip(candidates, keyword)]
 
-        prompt = f"""
+    def _retrieve(self, query_text, n_results, where=None):
+        """
+        Returns the query embedding along with the retrieval results.
+        """
+        with span("retrieve", queries=1):
+            # Generate embedding for the query
+            query_embedding = self.embedding_engine.generate_query_embedding(query_text)
+
+            # Query the database
+            results = self._search(query_text, query_embedding, n_results, where)
+        return query_embedding, results
+
+    def _use_hybrid(self):
+        # An empty keyword index (nothing ingested yet) falls back to vector search.
+        return self.retrieval_mode == "hybrid" and self.bm25_index is not None and len(self.bm25_index) > 0
+
+    def _search(self, query_text, query_embedding, n_results, where=None):
+        if not self._use_hybrid():
+            return self.vector_db.query_by_embedding(query_embedding, n_results=n_results, where=where)
+        candidates = n_results * self.candidate_multiplier
+        vector = self.vector_db.query_by_embedding(query_embedding, n_results=candidates, where=where)
+        with span("bm25_search", queries=1):
+            keyword = self.bm25_index.search(query_text, n_results=candidates, where=where)
+        return self._fuse(vector, keyword, n_results)
+
+    def _fuse(self, vector, keyword, n_results):
+        """
+        Combines vector results and BM25 (id, score) pairs with reciprocal
+        rank fusion. Returns a Chroma-shaped result whose `distances` are
+        fused ranks (0 = best) and whose `scores` are the RRF scores.
+        """
+        scores = {}
+        for rank, doc_id in enumerate(vector["ids"][0]):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        for rank, (doc_id, _) in enumerate(keyword):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        top = sorted(scores, key=scores.get, reverse=True)[:n_results]
+
+        rows = {i: (d, m) for i, d, m in zip(vector["ids"][0], vector["documents"][0], vector["metadatas"][0])}
+        missing = [i for i in top if i not in rows]
+        if missing:
+            fetched = self.vector_db.get_by_ids(missing)
+            rows.update({i: (d, m) for i, d, m in zip(fetched["ids"], fetched["documents"], fetched["metadatas"])})
+        top = [i for i in top if i in rows]
+
+        return {
+            "ids": [top],
+            "documents": [[rows[i][0] for i in top]],
+            "metadatas": [[rows[i][1] for i in top]],
+            "distances": [[float(rank) for rank in range(len(top))]],
+            "scores": [[scores[i] for i in top]],
+            "embeddings": None,
+        }
+
+    def build_context(self, results):
+        """
+        Formats retrieval results into a deduplicated, token-budgeted context.
+        Returns the dict from `context_builder.build_context`.
+        """
+        with span("build_context") as attrs:
+            context = build_context(results, max_tokens=self.context_budget)
+            attrs.update(tokens=context["tokens"], documents=len(context["ids"]))
+        incr("tokens_total", context["tokens"], stage="context")
+        return context
+
+    def _cached_answer(self, query_embedding, results, history=None):
+        # An answer that depends on earlier turns is not reusable for other sessions.
+        if self.semantic_cache is None or history:
+            return None
+        cached = self.semantic_cache.lookup(query_embedding, results["ids"][0])
+        cache_result("semantic", cached is not None, cached is None)
+        return cached
+
+    def _store_answer(self, query_embedding, results, answer, history=None):
+        # Errors are returned as text; never cache them.
+        if self.semantic_cache is not None and not history and not answer.startswith("Error"):
+            self.semantic_cache.store(query_embedding, results["ids"][0], answer)
+
+    def answer(self, query, n_results=3, where=None, history=None):
+        """
+        Retrieves context for `query` and generates an answer, reusing the
+        cached answer of a near-duplicate query with the same context.
+        `history` is the conversation so far (see `Conversation.context`);
+        answers that use it are not cached.
+        """
+        with span("answer"):
+            query_embedding, results = self._retrieve(query, n_results, where)
+            cached = self._cached_answer(query_embedding, results, history)
+            if cached is not None:
+                return cached
+            answer = self.generate_response(self.build_context(results)["text"], query, history)
+            self._store_answer(query_embedding, results, answer, history)
+            return answer
+
+    @traced("answer", stream=True)
+    def answer_stream(self, query, n_results=3, where=None, history=None):
+        """
+        Streaming variant of `answer`. A cached answer is yielded in one chunk.
+        """
+        query_embedding, results = self._retrieve(query, n_results, where)
+        cached = self._cached_answer(query_embedding, results, history)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        failed = False
+        for chunk in self.generate_response_stream(self.build_context(results)["text"], query, history):
+            # A stream can fail after some text has arrived; never cache the partial answer.
+            failed = failed or isinstance(chunk, ErrorChunk)
+            chunks.append(chunk)
+            yield chunk
+        if not failed:
+            self._store_answer(query_embedding, results, "".join(chunks), history)
+
+    def _build_prompt(self, context, query, history=None):
+        conversation = f"""
+        Conversation so far:
+        {history}
+        """ if history else ""
+        return f"""
         You are a career counselor AI. Use the following context to answer the user's question about career paths.
         
         Context:
         {context}
-        
+        {conversation}
         User Question:
         {query}
         
         Answer:
         """
-        
+
+    @staticmethod
+    def _count_tokens(attrs, prompt, response_text):
+        attrs.update(prompt_tokens=estimate_tokens(prompt), response_tokens=estimate_tokens(response_text))
+        incr("tokens_total", attrs["prompt_tokens"], stage="prompt")
+        incr("tokens_total", attrs["response_tokens"], stage="response")
+
+    def generate_response(self, context, query, history=None):
+        """
+        Generates a response using Gemini based on the retrieved context.
+        """
+        if self.llm is None:
+            return "Error: Gemini model not initialized. Check API Key."
+
+        prompt = self._build_prompt(context, query, history)
+        with span("generate") as attrs:
+            try:
+                text = self.llm.generate(prompt)
+                self._count_tokens(attrs, prompt, text)
+                return text
+            except Exception as e:
+                attrs["error"] = type(e).__name__
+                return f"Error generating response: {e}"
+
+    @traced("generate", stream=True)
+    def generate_response_stream(self, context, query, history=None):
+        """
+        Streaming variant of `generate_response`.
+        Yields text chunks as they arrive from Gemini; a failure is yielded
+        as an `ErrorChunk`, possibly after some text.
+        """
+        if self.llm is None:
+            yield ErrorChunk("Error: Gemini model not initialized. Check API Key.")
+            return
+
+        prompt = self._build_prompt(context, query, history)
+        attrs = span_attributes()
+        start = time.perf_counter()
+        chunks = []
+        try:
+            for chunk in self.llm.generate_stream(prompt):
+                if not chunks:
+                    attrs["first_chunk_ms"] = (time.perf_counter() - start) * 1000
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            attrs["error"] = type(e).__name__
+            yield ErrorChunk(f"\n\nError generating response: {e}" if chunks else f"Error generating response: {e}")
+        self._count_tokens(attrs, prompt, "".join(chunks))
+
+    def _semaphore(self):
+        """
+        Returns the running event loop's concurrency semaphore, creating it on first use.
+        """
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    async def aretrieve(self, query_text, n_results=3, where=None):
+        """
+        Async variant of `retrieve_relevant_careers`.
+        Raises asyncio.TimeoutError if the stage exceeds `retrieve_timeout`.
+        """
+        async with self._semaphore():
+            _, results = await asyncio.wait_for(
+                self._aretrieve(query_text, n_results, where), self.retrieve_timeout
+            )
+        return results
+
+    async def _aretrieve(self, query_text, n_results, where=None):
+        with span("retrieve", queries=1):
+            query_embedding = await self.embedding_engine.agenerate_query_embedding(query_text)
+            # Chroma has no async client; keep its query off the event loop.
+            results = await asyncio.to_thread(self._search, query_text, query_embedding, n_results, where)
+        return query_embedding, results
+
+    async def agenerate(self, context, query, history=None):
+        """
+        Async variant of `generate_response`, using the model's async call.
+        The timeout includes time spent waiting for the rate limiter.
+        """
+        if self.llm is None:
+            return "Error: Gemini model not initialized. Check API Key."
+
+        prompt = self._build_prompt(context, query, history)
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            async with self._semaphore():
+                with span("generate") as attrs:
+                    text = await asyncio.wait_for(self.llm.agenerate(prompt), self.generate_timeout)
+                    self._count_tokens(attrs, prompt, text)
+            return text
+        except asyncio.TimeoutError:
+            return f"Error generating response: timed out after {self.generate_timeout}s"
         except Exception as e:
             return f"Error generating response: {e}"
 
+    async def aanswer(self, query, n_results=3, where=None, history=None):
+        """
+        Async variant of `answer`.
+        Returns a dict with the retrieval `results`, the `answer` text and the
+        estimated `context_tokens` sent to the model.
+        """
+        with span("answer"):
+            async with self._semaphore():
+                query_embedding, results = await asyncio.wait_for(
+                    self._aretrieve(query, n_results, where), self.retrieve_timeout
+                )
+            answer = self._cached_answer(query_embedding, results, history)
+            context_tokens = 0
+            if answer is None:
+                context = self.build_context(results)
+                context_tokens = context["tokens"]
+                answer = await self.agenerate(context["text"], query, history)
+                self._store_answer(query_embedding, results, answer, history)
+        return {"results": results, "answer": answer, "context_tokens": context_tokens}
+
 if __name__ == "__main__":
     # Test the pipeline
     rag = RAGPipeline()
@@ -66,6 +350,6 @@ if __name__ == "__main__":
     print("Retrieved:", results)
     
     # Simple generation test (requires API key)
-    context = str(results)
+    context = rag.build_context(results)["text"]
     answer = rag.generate_response(context, query)
     print("Answer:", answer)
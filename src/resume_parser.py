@@ -1,79 +1,208 @@
-import fitz  # PyMuPDF
+import hashlib
 import os
 import json
-import google.generativeai as genai
 from dotenv import load_dotenv
+from context_builder import estimate_tokens, truncate_to_tokens
+from llm_client import LLMClient, get_llm_client
+from resume_rules import extract_resume_fields
+from skills import normalize_skill
+from sqlite_cache import SQLiteCache
+from telemetry import cache_result, incr, span, traced
 
 load_dotenv()
 
-def extract_text_from_pdf(pdf_path):
+_resume_cache = None
+
+def get_resume_cache():
+    """
+    Returns the process-wide resume cache, creating it on first use.
+    """
+    global _resume_cache
+    if _resume_cache is None:
+        _resume_cache = SQLiteCache("./cache/resumes.sqlite3", max_entries=2000)
+    return _resume_cache
+
+# Bounds on worst-case extraction work per document.
+MAX_PDF_BYTES = 20 * 1024 * 1024
+MAX_PDF_PAGES = 60
+
+@traced("pdf_extract")
+def extract_text_from_pdf(pdf_source, max_pages=MAX_PDF_PAGES, max_bytes=MAX_PDF_BYTES):
     """
     Extracts text from a PDF file using PyMuPDF.
+    `pdf_source` is a file path or the raw PDF bytes. Only the first
+    `max_pages` pages are read, and files larger than `max_bytes` are
+    rejected. Extraction runs in the calling process; bulk_resumes
+    parallelizes across documents instead.
     """
-    if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"File not found: {pdf_path}")
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        pdf_bytes = bytes(pdf_source)
+    else:
+        if not os.path.exists(pdf_source):
+            raise FileNotFoundError(f"File not found: {pdf_source}")
+        if os.path.getsize(pdf_source) > max_bytes:
+            raise ValueError(f"PDF exceeds the {max_bytes // (1024 * 1024)} MB limit: {pdf_source}")
+        with open(pdf_source, "rb") as f:
+            pdf_bytes = f.read()
 
-    doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    
-    return text
+    if len(pdf_bytes) > max_bytes:
+        raise ValueError(f"PDF exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+
+    # PyMuPDF is loaded on the first extraction rather than at import time.
+    import fitz
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = min(doc.page_count, max_pages)
+        if doc.page_count > max_pages:
+            print(f"Warning: PDF has {doc.page_count} pages; extracting the first {max_pages}.")
+
+        return "".join(doc[i].get_text() for i in range(page_count))
+
+# Switching to gemini-2.0-flash as 1.5 versions were giving 404
+MODEL_NAME = 'gemini-2.0-flash'
+
+# Upper bound on resume text sent to Gemini in one prompt.
+MAX_RESUME_PROMPT_TOKENS = 3000
+
+# Fields the LLM is asked for, with the format it should use.
+LLM_FIELDS = {
+    "name": "name (string)",
+    "email": "email (string)",
+    "phone": "phone (string)",
+    "skills": "skills (list of strings)",
+    "education": "education (list of objects with 'degree', 'institution', 'year')",
+    "experience": "experience (list of objects with 'role', 'company', 'duration', 'description')",
+}
+
+# Resume sections that hold the information for each field.
+FIELD_SECTIONS = {
+    "name": ["header"],
+    "email": ["header"],
+    "phone": ["header"],
+    "skills": ["skills", "summary"],
+    "education": ["education"],
+    "experience": ["experience", "projects"],
+}
+
+def _resume_excerpt(sections, fields, text):
+    """
+    Returns only the sections relevant to `fields`, or the full text if
+    none of them were detected.
+    """
+    names = []
+    for field in fields:
+        names.extend(n for n in FIELD_SECTIONS[field] if sections.get(n) and n not in names)
+    if not names:
+        return text
+    return "\n\n".join(f"{name.title()}:\n{sections[name]}" for name in names)
 
-def parse_resume(text):
+def _merge_skills(found, extra):
     """
-    Parses raw text to extract structured information using Gemini.
+    Appends skills from `extra` not already in `found`, compared in canonical form.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        print("Warning: GEMINI_API_KEY not found. Falling back to basic regex parser (not implemented).")
-        return {"raw_text": text, "error": "API Key missing"}
+    seen = {normalize_skill(s) for s in found}
+    merged = list(found)
+    for skill in extra:
+        if isinstance(skill, str) and skill.strip() and normalize_skill(skill) not in seen:
+            seen.add(normalize_skill(skill))
+            merged.append(skill)
+    return merged
 
-    genai.configure(api_key=api_key.strip())
-    # Switching to gemini-2.0-flash as 1.5 versions were giving 404
-    model = genai.GenerativeModel('gemini-2.0-flash')
+@traced("parse_resume")
+def parse_resume(text, model=None):
+    """
+    Parses raw text to extract structured information.
+    A rule-based stage fills what it can locally (see resume_rules); Gemini
+    is only asked for the fields it could not fill, with just the relevant
+    resume sections, through the shared rate-limited client.
+    `model` replaces the Gemini model (an `LLMClient` or a stand-in to wrap).
+    """
+    local = extract_resume_fields(text)
+    sections = local.pop("sections")
+    partial = local.pop("partial")
+    data = {
+        "name": local["name"],
+        "email": local["email"],
+        "phone": local["phone"],
+        "skills": local["skills"],
+        "education": local["education"],
+        "experience": local["experience"],
+        "raw_text": text,  # Keep raw text for reference
+    }
+    # Partial fields keep their rule-based values but are still asked for.
+    missing = [field for field in LLM_FIELDS if not data.get(field) or field in partial]
+    if not missing:
+        return data
+
+    if model is None:
+        llm = get_llm_client(MODEL_NAME)
+    else:
+        llm = model if isinstance(model, LLMClient) else LLMClient(model)
+    if llm is None:
+        print("Warning: GEMINI_API_KEY not found. Returning fields from the rule-based parser only.")
+        data["error"] = "API Key missing"
+        return data
 
-    print(f"DEBUG: Extracted text length: {len(text)}")
-    print(f"DEBUG: Extracted text preview: {text[:200]}...")
+    excerpt = truncate_to_tokens(_resume_excerpt(sections, missing, text), MAX_RESUME_PROMPT_TOKENS)
 
+    required = "\n".join(f"    - {LLM_FIELDS[field]}" for field in missing)
     prompt = f"""
     You are an expert Resume Parser. Extract the following information from the resume text below and return it as a valid JSON object.
     
     Resume Text:
-    {text}
+    {excerpt}
     
     Required Fields:
-    - name (string)
-    - email (string)
-    - phone (string)
-    - skills (list of strings)
-    - education (list of objects with 'degree', 'institution', 'year')
-    - experience (list of objects with 'role', 'company', 'duration', 'description')
+{required}
     
     Return ONLY the JSON object. Do not include markdown formatting like ```json ... ```.
     """
     
     try:
-        print("DEBUG: Sending request to Gemini...")
-        response = model.generate_content(prompt)
-        print("DEBUG: Response received.")
+        filled = [field for field in LLM_FIELDS if field not in missing]
+        with span("resume_llm", fields=missing, filled=filled, excerpt_tokens=estimate_tokens(excerpt)) as attrs:
+            response_text = llm.generate(prompt)
+            attrs.update(prompt_tokens=estimate_tokens(prompt), response_tokens=estimate_tokens(response_text))
+        incr("tokens_total", attrs["prompt_tokens"], stage="resume_prompt")
+        incr("tokens_total", attrs["response_tokens"], stage="resume_response")
         # Clean response if it contains markdown code blocks
-        cleaned_text = response.text.replace("```json", "").replace("```", "").strip()
-        print(f"DEBUG: Cleaned response text: {cleaned_text}")
-        data = json.loads(cleaned_text)
-        data["raw_text"] = text # Keep raw text for reference
+        cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
+        parsed = json.loads(cleaned_text)
+        for field in missing:
+            if field == "skills" and data["skills"] and parsed.get("skills"):
+                data["skills"] = _merge_skills(data["skills"], parsed["skills"])
+            elif parsed.get(field):
+                data[field] = parsed[field]
         return data
     except Exception as e:
         print(f"Error parsing resume with Gemini: {e}")
-        if 'response' in locals():
-            print(f"Raw response: {response.text}")
-        return {
-            "raw_text": text,
-            "error": str(e),
-            "skills": [],
-            "education": [],
-            "experience": []
-        }
+        if 'response_text' in locals():
+            print(f"Raw response: {response_text}")
+        data["error"] = str(e)
+        return data
+
+def analyze_resume(pdf_bytes, cache=None, model=None):
+    """
+    Extracts and parses a resume PDF given its raw bytes; `model` is
+    passed to `parse_resume`.
+    Results are cached by the SHA-256 of the bytes, so repeat uploads skip
+    both PDF extraction and the LLM call. Failed parses are not cached.
+    Returns the parsed data, including `raw_text`.
+    """
+    cache = cache if cache is not None else get_resume_cache()
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+
+    cached = cache.get(digest)
+    cache_result("resume", cached is not None, cached is None)
+    if cached is not None:
+        print(f"Resume cache hit: {digest[:12]}")
+        return cached
+    print(f"Resume cache miss: {digest[:12]}")
+
+    text = extract_text_from_pdf(pdf_bytes)
+    data = parse_resume(text, model=model)
+    if "error" not in data:
+        cache.set(digest, data)
+    return data
 
 if __name__ == "__main__":
     # Test with a dummy file if it exists
@@ -0,0 +1,212 @@
+import re
+from skills import KNOWN_SKILLS, SKILL_ALIASES, normalize_skill
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)|\d{2,4})[\s.-]?\d{3,4}[\s.-]?\d{3,4}")
+
+# Canonical section name -> headings that introduce it.
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "objective", "about me", "professional summary"],
+    "skills": ["skills", "technical skills", "core competencies", "key skills", "technologies"],
+    "experience": ["experience", "work experience", "professional experience", "employment history", "work history"],
+    "education": ["education", "academic background", "qualifications"],
+    "projects": ["projects", "personal projects"],
+    "certifications": ["certifications", "certificates", "licenses"],
+}
+_HEADING_TO_SECTION = {h: name for name, headings in SECTION_HEADINGS.items() for h in headings}
+_HEADING_RE = re.compile(r"^\s*([A-Za-z][A-Za-z ]{2,39}?)\s*(?::\s*(.*))?$")
+
+# Canonical lower-case skill -> display name.
+_DISPLAY_NAMES = {normalize_skill(s): s for s in KNOWN_SKILLS}
+
+# Single letters and everyday words: matched only with this exact casing and
+# never in free text, where "go", "spring" or "excel" are rarely skills.
+AMBIGUOUS_SKILLS = {"C", "R", "Go", "Rust", "Swift", "Spring", "Express", "Excel", "Agile"}
+
+# A skill list item is short; longer entries are prose.
+_MAX_ITEM_WORDS = 4
+_ITEM_SPLIT_RE = re.compile(r"[,;|\n\u2022]|\s+[-*]\s+|^\s*[-*]\s+", re.MULTILINE)
+_ITEM_LABEL_RE = re.compile(r"^[A-Za-z /&]{2,30}:\s*")
+
+_matchers = None
+
+def _regex_matcher(terms, flags):
+    alternation = "|".join(re.escape(p) for p in sorted(terms, key=len, reverse=True))
+    regex = re.compile(rf"(?<![\w+#])(?:{alternation})(?![\w+#])", flags)
+
+    def match(text):
+        return [m.span() for m in regex.finditer(text)]
+    return match
+
+def _build_matchers():
+    """
+    Builds a case-insensitive spaCy PhraseMatcher over the skill dictionary
+    and its aliases (a regex alternation if spaCy is unavailable), and an
+    exact-case regex for AMBIGUOUS_SKILLS. spaCy keeps a sentence-final
+    "R." or "Go." as one token, so the short ambiguous terms are matched on
+    character boundaries instead. Each matcher returns (start, end) offsets.
+    """
+    ambiguous = {normalize_skill(s) for s in AMBIGUOUS_SKILLS}
+    patterns = {p for p in _DISPLAY_NAMES if p not in ambiguous}
+    patterns |= {a for a, c in SKILL_ALIASES.items() if c in _DISPLAY_NAMES}
+    exact = _regex_matcher(AMBIGUOUS_SKILLS, 0)
+    try:
+        import spacy
+        from spacy.matcher import PhraseMatcher
+    except ImportError:
+        return _regex_matcher(patterns, re.IGNORECASE), exact
+
+    nlp = spacy.blank("en")
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    matcher.add("SKILL", list(nlp.tokenizer.pipe(sorted(patterns))))
+
+    def match(text):
+        doc = nlp.make_doc(text)
+        return [(doc[start:end].start_char, doc[start:end].end_char) for _, start, end in matcher(doc)]
+    return match, exact
+
+def _bounded(text, start, end):
+    # spaCy tokens can end inside a longer name such as "C++" or start after a ".".
+    return text[end:end + 1] not in ("+", "#") and text[start - 1:start] not in ("+", "#", ".")
+
+def match_skills(text, ambiguous=True):
+    """
+    Returns dictionary skills mentioned in `text`, in display form and first-seen order.
+    AMBIGUOUS_SKILLS are matched (case-sensitively) only when `ambiguous` is True;
+    pass False for free text such as a whole resume.
+    """
+    global _matchers
+    if _matchers is None:
+        _matchers = _build_matchers()
+    spans = _matchers[0](text)
+    if ambiguous:
+        spans += _matchers[1](text)
+    found = {}
+    for start, end in sorted(spans):
+        canonical = normalize_skill(text[start:end])
+        if canonical in _DISPLAY_NAMES and _bounded(text, start, end):
+            found.setdefault(canonical, _DISPLAY_NAMES[canonical])
+    return list(found.values())
+
+def parse_skills_section(section):
+    """
+    Returns the skills listed in a skills section: each short comma-,
+    semicolon- or bullet-separated item (dictionary skills in display form),
+    plus dictionary skills mentioned in longer prose items.
+    """
+    found = {}
+    for item in _ITEM_SPLIT_RE.split(section):
+        item = _ITEM_LABEL_RE.sub("", item.strip()).strip(" .")
+        if not item:
+            continue
+        if len(item.split()) <= _MAX_ITEM_WORDS and len(item) <= 40:
+            canonical = normalize_skill(item)
+            found.setdefault(canonical, _DISPLAY_NAMES.get(canonical, item))
+        else:
+            for skill in match_skills(item):
+                found.setdefault(normalize_skill(skill), skill)
+    return list(found.values())
+
+def segment_sections(text):
+    """
+    Splits resume text into sections keyed by canonical name.
+    Lines before the first heading go under "header".
+    """
+    sections = {"header": []}
+    current = "header"
+    for line in text.splitlines():
+        m = _HEADING_RE.match(line)
+        if m and m.group(1).strip().lower() in _HEADING_TO_SECTION:
+            current = _HEADING_TO_SECTION[m.group(1).strip().lower()]
+            sections.setdefault(current, [])
+            # Inline content, e.g. "Skills: Python, SQL".
+            if m.group(2):
+                sections[current].append(m.group(2))
+        else:
+            sections.setdefault(current, []).append(line)
+    return {name: "\n".join(lines).strip() for name, lines in sections.items()}
+
+def _guess_name(header):
+    for line in header.splitlines():
+        line = line.strip()
+        if not line or EMAIL_RE.search(line) or PHONE_RE.search(line):
+            continue
+        words = line.split()
+        if 2 <= len(words) <= 4 and all(w.replace(".", "").replace("-", "").isalpha() for w in words):
+            return line
+        return None
+    return None
+
+# "Junior Developer at Tech Corp (2022-Present)"
+_EXPERIENCE_RE = re.compile(r"^(?P<role>.+?)\s+(?:at|@)\s+(?P<company>.+?)\s*\((?P<duration>[^)]*\d{4}[^)]*)\)\s*$")
+# "B.S. in Computer Science, University of Tech (2018-2022)"
+_EDUCATION_RE = re.compile(r"^(?P<degree>.+?),\s*(?P<institution>.+?)\s*\((?P<year>[^)]*\d{4}[^)]*)\)\s*$")
+
+def _parse_experience(section):
+    """
+    Returns (entries, complete): `complete` is False if any line other than
+    a bullet did not match the "Role at Company (dates)" format.
+    """
+    entries = []
+    complete = True
+    for line in section.splitlines():
+        line = line.strip()
+        m = _EXPERIENCE_RE.match(line)
+        if m:
+            entries.append({**{k: v.strip() for k, v in m.groupdict().items()}, "description": ""})
+        elif entries and line.startswith(("-", "*", "•")):
+            bullet = line.lstrip("-*• ").strip()
+            entries[-1]["description"] = f"{entries[-1]['description']} {bullet}".strip()
+        elif line:
+            complete = False
+    return entries, complete
+
+def _parse_education(section):
+    """
+    Returns (entries, complete), like `_parse_experience`.
+    """
+    entries = []
+    complete = True
+    for line in section.splitlines():
+        m = _EDUCATION_RE.match(line.strip())
+        if m:
+            entries.append({k: v.strip() for k, v in m.groupdict().items()})
+        elif line.strip():
+            complete = False
+    return entries, complete
+
+def extract_resume_fields(text):
+    """
+    Extracts name, email, phone, skills and simply formatted education and
+    experience entries with regexes and the skill dictionary. Fields that
+    cannot be found are None or empty. Also returns the detected
+    `sections` for later stages, and as `partial` the list fields whose
+    rule-based values may be incomplete: skills without a skills section
+    (only dictionary hits from the whole text), and education or
+    experience sections with lines the regexes could not parse.
+    """
+    sections = segment_sections(text)
+    email = EMAIL_RE.search(text)
+    phone = PHONE_RE.search(text)
+    partial = []
+    if sections.get("skills"):
+        skills = parse_skills_section(sections["skills"])
+    else:
+        skills = match_skills(text, ambiguous=False)
+        partial.append("skills")
+    education, complete = _parse_education(sections.get("education", ""))
+    if not complete:
+        partial.append("education")
+    experience, complete = _parse_experience(sections.get("experience", ""))
+    if not complete:
+        partial.append("experience")
+    return {
+        "name": _guess_name(sections.get("header", "")),
+        "email": email.group(0) if email else None,
+        "phone": phone.group(0).strip() if phone else None,
+        "skills": skills,
+        "education": education,
+        "experience": experience,
+        "sections": sections,
+        "partial": partial,
+    }
@@ -1,29 +1,37 @@
-import os
-import google.generativeai as genai
+import hashlib
+import json
+import time
 from dotenv import load_dotenv
+from skills import normalize_role, normalize_skills
+from context_builder import estimate_tokens
+from llm_client import LLMClient, get_llm_client
+from sqlite_cache import SQLiteCache
+from telemetry import cache_result, incr, span, span_attributes, traced
 
 load_dotenv()
 
+MODEL_NAME = 'gemini-flash-latest'
+
 class RoadmapEngine:
-    def __init__(self):
+    def __init__(self, model=None, cache=None, use_cache=True):
         """
         Initializes the Roadmap Engine with Gemini.
+        `model` replaces the Gemini model (e.g. with a local fake for benchmarks);
+        it may be an `LLMClient`, otherwise it is wrapped in one without rate limits.
+        Roadmaps are cached on disk by normalized skills and role unless
+        `use_cache` is False.
         """
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            print("Warning: GEMINI_API_KEY not found in environment variables.")
-        else:
-            genai.configure(api_key=api_key.strip())
-            self.model = genai.GenerativeModel('gemini-flash-latest')
+        if cache is None and use_cache:
+            cache = SQLiteCache("./cache/roadmaps.sqlite3", max_entries=5000)
+        self.cache = cache
 
-    def generate_roadmap(self, current_skills, target_role):
-        """
-        Generates a learning roadmap from current skills to the target role.
-        """
-        if not hasattr(self, 'model'):
-            return "Error: Gemini model not initialized. Check API Key."
+        if model is None:
+            self.llm = get_llm_client(MODEL_NAME)
+        else:
+            self.llm = model if isinstance(model, LLMClient) else LLMClient(model)
 
-        prompt = f"""
+    def _build_prompt(self, current_skills, target_role):
+        return f"""
         Create a detailed step-by-step learning roadmap for a user who wants to become a {target_role}.
         
         Current Skills: {', '.join(current_skills)}
@@ -38,12 +46,92 @@ class RoadmapEngine:
         
         Format the output clearly in Markdown. Use bolding and lists for readability.
         """
-        
+
+    @staticmethod
+    def cache_key(current_skills, target_role):
+        """
+        Builds a cache key from the canonical skill set and role, so
+        reordered, re-cased or aliased inputs share one roadmap.
+        """
+        payload = json.dumps([MODEL_NAME, normalize_skills(current_skills), normalize_role(target_role)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, current_skills, target_role, regenerate):
+        if self.cache is None or regenerate:
+            return None
+        cached = self.cache.get(self.cache_key(current_skills, target_role))
+        cache_result("roadmap", cached is not None, cached is None)
+        return cached
+
+    def _cache_set(self, current_skills, target_role, roadmap):
+        # Errors are returned as text; never cache them.
+        if self.cache is not None and roadmap and not roadmap.startswith("Error"):
+            self.cache.set(self.cache_key(current_skills, target_role), roadmap)
+
+    @staticmethod
+    def _count_tokens(attrs, prompt, roadmap):
+        attrs.update(prompt_tokens=estimate_tokens(prompt), response_tokens=estimate_tokens(roadmap))
+        incr("tokens_total", attrs["prompt_tokens"], stage="roadmap_prompt")
+        incr("tokens_total", attrs["response_tokens"], stage="roadmap_response")
+
+    def generate_roadmap(self, current_skills, target_role, regenerate=False):
+        """
+        Generates a learning roadmap from current skills to the target role.
+        Returns a cached roadmap for equivalent inputs unless `regenerate` is True.
+        """
+        with span("roadmap") as attrs:
+            cached = self._cache_get(current_skills, target_role, regenerate)
+            attrs["cached"] = cached is not None
+            if cached is not None:
+                return cached
+
+            if self.llm is None:
+                return "Error: Gemini model not initialized. Check API Key."
+
+            prompt = self._build_prompt(current_skills, target_role)
+            try:
+                roadmap = self.llm.generate(prompt)
+            except Exception as e:
+                attrs["error"] = type(e).__name__
+                return f"Error generating roadmap: {e}"
+            self._count_tokens(attrs, prompt, roadmap)
+            self._cache_set(current_skills, target_role, roadmap)
+            return roadmap
+
+    @traced("roadmap", stream=True)
+    def generate_roadmap_stream(self, current_skills, target_role, regenerate=False):
+        """
+        Streaming variant of `generate_roadmap`.
+        Yields Markdown chunks as they arrive from Gemini; a cached roadmap
+        is yielded in one chunk.
+        """
+        attrs = span_attributes()
+        cached = self._cache_get(current_skills, target_role, regenerate)
+        attrs["cached"] = cached is not None
+        if cached is not None:
+            yield cached
+            return
+
+        if self.llm is None:
+            yield "Error: Gemini model not initialized. Check API Key."
+            return
+
+        prompt = self._build_prompt(current_skills, target_role)
+        start = time.perf_counter()
+        chunks = []
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            for chunk in self.llm.generate_stream(prompt):
+                if not chunks:
+                    attrs["first_chunk_ms"] = (time.perf_counter() - start) * 1000
+                chunks.append(chunk)
+                yield chunk
         except Exception as e:
-            return f"Error generating roadmap: {e}"
+            attrs["error"] = type(e).__name__
+            yield f"Error generating roadmap: {e}"
+            return
+        roadmap = "".join(chunks)
+        self._count_tokens(attrs, prompt, roadmap)
+        self._cache_set(current_skills, target_role, roadmap)
 
 if __name__ == "__main__":
     # Test the engine
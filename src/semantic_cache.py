@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+class SemanticCache:
+    def __init__(self, threshold=0.95, ttl=3600, max_entries=1000):
+        """
+        In-memory cache of generated answers, looked up by query similarity.
+        A query hits when an unexpired entry retrieved the same context ids
+        and its query embedding has cosine similarity >= `threshold`.
+        Least recently used entries are evicted past `max_entries`.
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # entry id -> (vector, context key, answer, created)
+        self._by_context = {}          # context key -> set of entry ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id):
+        _, context_key, _, _ = self._entries.pop(entry_id)
+        ids = self._by_context[context_key]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_context[context_key]
+
+    def lookup(self, embedding, context_ids):
+        """
+        Returns the cached answer for a similar query with the same context, or None.
+        """
+        vector = self._normalize(embedding)
+        context_key = tuple(context_ids)
+        now = time.time()
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._by_context.get(context_key, ())):
+                cached_vector, _, _, created = self._entries[entry_id]
+                if now - created > self.ttl:
+                    self._remove(entry_id)
+                    continue
+                score = float(np.dot(vector, cached_vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][2]
+
+    def store(self, embedding, context_ids, answer):
+        """
+        Caches `answer` for the query embedding and its retrieved context ids.
+        """
+        context_key = tuple(context_ids)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (self._normalize(embedding), context_key, answer, time.time())
+            self._by_context.setdefault(context_key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the hit rate.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
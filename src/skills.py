@@ -0,0 +1,76 @@
+import re
+
+# Common abbreviations and spellings mapped to one canonical skill name.
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "c sharp": "c#",
+    "cpp": "c++",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "gcp": "google cloud",
+    "amazon web services": "aws",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "ai": "artificial intelligence",
+    "tf": "tensorflow",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "cicd": "ci/cd",
+    "stats": "statistics",
+}
+
+ROLE_ALIASES = {
+    "ml engineer": "machine learning engineer",
+    "sde": "software engineer",
+    "swe": "software engineer",
+    "software developer": "software engineer",
+    "devops": "devops engineer",
+    "pm": "product manager",
+}
+
+def normalize_skill(skill):
+    """
+    Case-folds, trims and alias-normalizes a single skill name.
+    """
+    skill = " ".join(skill.casefold().split()).strip(" .,;:")
+    return SKILL_ALIASES.get(skill, skill)
+
+def normalize_skills(skills):
+    """
+    Returns the sorted, de-duplicated canonical form of a skill list.
+    """
+    return sorted({normalize_skill(s) for s in skills if s and s.strip()})
+
+def normalize_role(role):
+    """
+    Case-folds and alias-normalizes a target role.
+    """
+    role = " ".join(re.sub(r"[^\w\s/+#.-]", " ", role.casefold()).split())
+    return ROLE_ALIASES.get(role, role)
+
+# Skill dictionary used for rule-based extraction, in display form.
+KNOWN_SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Rust", "Ruby", "PHP",
+    "Kotlin", "Swift", "Scala", "R", "MATLAB", "Bash", "SQL", "NoSQL", "HTML", "CSS",
+    "React", "Angular", "Vue", "Node.js", "Express", "Django", "Flask", "FastAPI", "Spring",
+    "PostgreSQL", "MySQL", "SQLite", "MongoDB", "Redis", "Elasticsearch", "Kafka", "Spark", "Hadoop",
+    "Docker", "Kubernetes", "Terraform", "Ansible", "Jenkins", "CI/CD", "Git", "Linux",
+    "AWS", "Azure", "Google Cloud",
+    "Machine Learning", "Deep Learning", "Natural Language Processing", "Computer Vision",
+    "Artificial Intelligence", "Data Analysis", "Data Visualization", "Statistics",
+    "TensorFlow", "PyTorch", "Keras", "scikit-learn", "Pandas", "NumPy", "Tableau", "Power BI", "Excel",
+    "REST APIs", "GraphQL", "Microservices", "Agile", "Scrum",
+    "Communication", "Leadership", "Project Management", "Product Management", "Prioritization",
+]
@@ -0,0 +1,157 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite caps the number of bound parameters, so keys are looked up in slices.
+_SLICE = 500
+# Eviction frees this fraction of `max_entries` at once, so a full cache
+# does not evict (and recount) on every new key.
+EVICT_FRACTION = 0.1
+
+class SQLiteCache:
+    def __init__(self, path, max_entries=10000, ttl=None):
+        """
+        Small persistent key-value cache for JSON-serializable values.
+        Backed by SQLite in WAL mode, so it can be shared by threads,
+        Streamlit sessions and separate worker processes. Least recently used
+        rows are evicted past `max_entries`, down to EVICT_FRACTION below it;
+        rows older than `ttl` seconds (if set) are treated as missing.
+        The row count is read once and then tracked per write, so a write
+        does not scan the table; rows added by other processes are picked up
+        when this one recounts before evicting.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Reentrant so subclasses can wrap these methods under the same lock.
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access)")
+        self._conn.commit()
+        self._entries = self._count()
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _encode(self, value):
+        return json.dumps(value)
+
+    def _decode(self, stored):
+        return json.loads(stored)
+
+    def get_many(self, keys):
+        """
+        Looks up several keys at once. Returns a dict of the keys that were found.
+        """
+        now = time.time()
+        found = {}
+        with self._lock:
+            expired = []
+            for i in range(0, len(keys), _SLICE):
+                part = keys[i:i + _SLICE]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created FROM cache WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, stored, created in rows:
+                    if self.ttl is not None and now - created > self.ttl:
+                        expired.append((key,))
+                    else:
+                        found[key] = self._decode(stored)
+            if expired:
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", expired)
+                self._entries -= len(expired)
+            if found:
+                self._conn.executemany("UPDATE cache SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+            if expired or found:
+                self._conn.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def get(self, key):
+        """
+        Returns the cached value for `key`, or None.
+        """
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items):
+        """
+        Stores (key, value) pairs, evicting the least recently used rows if needed.
+        """
+        now = time.time()
+        rows = {key: (key, self._encode(value), now, now) for key, value in items}
+        if not rows:
+            return
+        with self._lock:
+            keys = list(rows)
+            existing = 0
+            for i in range(0, len(keys), _SLICE):
+                part = keys[i:i + _SLICE]
+                placeholders = ",".join("?" * len(part))
+                existing += self._conn.execute(
+                    f"SELECT COUNT(*) FROM cache WHERE key IN ({placeholders})", part
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, created, last_access) VALUES (?, ?, ?, ?)",
+                rows.values()
+            )
+            self._entries += len(rows) - existing
+            if self._entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def set(self, key, value):
+        """
+        Stores `value` under `key`, evicting the least recently used rows if needed.
+        """
+        self.set_many([(key, value)])
+
+    def _evict(self):
+        # Recount first: other processes may have added or evicted rows.
+        count = self._count()
+        if count > self.max_entries:
+            target = self.max_entries - int(self.max_entries * EVICT_FRACTION)
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY last_access ASC LIMIT ?)",
+                (count - target,)
+            )
+            count = target
+        self._entries = count
+
+    def delete(self, key):
+        with self._lock:
+            self._entries -= self._conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the hit rate.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,333 @@
+import atexit
+import contextlib
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Upper bounds, in seconds, of the stage latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX = "careerpath_"
+
+# The innermost open span; async tasks and to_thread calls inherit it.
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(pairs):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+class Telemetry:
+    def __init__(self, max_spans=10000, enabled=True):
+        """
+        In-process spans and counters for the pipeline stages.
+        Span durations feed per-stage latency histograms; counters track
+        cache hits and token counts. Metrics export as Prometheus text and
+        the last `max_spans` spans as a Chrome trace-event JSON file, which
+        chrome://tracing and Perfetto can open.
+        """
+        self.enabled = enabled
+        self._spans = deque(maxlen=max_spans)
+        self._histograms = {}  # stage -> [per-bucket counts, sum, count]
+        self._counters = {}    # (name, sorted label pairs) -> value
+        self._gauges = {}      # (name, sorted label pairs) -> value
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def _open(self, name, attributes):
+        parent = _current_span.get()
+        span_id = next(self._ids)
+        record = {
+            "name": name,
+            "id": span_id,
+            "parent": parent["id"] if parent else None,
+            "trace": parent["trace"] if parent else span_id,
+            "thread": threading.get_ident(),
+            "attributes": attributes,
+        }
+        return parent, record
+
+    def _close(self, record, start):
+        record["start"] = start - self._origin
+        record["duration"] = time.perf_counter() - start
+        self._record(record)
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        """
+        Times the enclosed block as stage `name`. Yields the attribute dict,
+        so the block can attach results such as token counts. Spans opened
+        inside the block become its children.
+        Do not hold a span open across a generator's `yield`: decorate the
+        generator function with `traced` instead.
+        """
+        if not self.enabled:
+            yield attributes
+            return
+        parent, record = self._open(name, attributes)
+        _current_span.set(record)
+        start = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            _current_span.set(parent)
+            self._close(record, start)
+
+    def _traced_generator(self, name, generator, attributes):
+        """
+        Times `generator` from its first step until it is exhausted or closed.
+        The span is current only while the generator body runs, so code
+        between chunks, in the caller, never sees it as its parent.
+        """
+        if not self.enabled:
+            yield from generator
+            return
+        _, record = self._open(name, attributes)
+        start = time.perf_counter()
+        try:
+            while True:
+                token = _current_span.set(record)
+                try:
+                    chunk = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    _current_span.reset(token)
+                yield chunk
+        except BaseException as e:
+            # Includes GeneratorExit from a stream closed early.
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            token = _current_span.set(record)
+            try:
+                generator.close()
+            finally:
+                _current_span.reset(token)
+                self._close(record, start)
+
+    def traced(self, name, **attributes):
+        """
+        Decorator form of `span` for functions, coroutine functions and
+        generator functions. A generator body reads its span's attribute
+        dict with `span_attributes()`.
+        """
+        def decorator(fn):
+            if inspect.isgeneratorfunction(fn):
+                @functools.wraps(fn)
+                def generator_wrapper(*args, **kwargs):
+                    return self._traced_generator(name, fn(*args, **kwargs), dict(attributes))
+                return generator_wrapper
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name, **attributes):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **attributes):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _record(self, record):
+        duration = record["duration"]
+        with self._lock:
+            self._spans.append(record)
+            histogram = self._histograms.get(record["name"])
+            if histogram is None:
+                histogram = self._histograms[record["name"]] = [[0] * len(BUCKETS), 0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += duration
+            histogram[2] += 1
+
+    def incr(self, name, value=1, **labels):
+        """
+        Adds `value` to counter `name` with the given labels,
+        e.g. incr("cache_requests_total", cache="roadmap", result="hit").
+        """
+        if not self.enabled or not value:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """
+        Sets gauge `name` to `value`, e.g. set_gauge("llm_queue_depth", 3, model="...").
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def cache_result(self, cache, hits, misses=0):
+        """
+        Counts `hits` and `misses` for the named cache.
+        """
+        self.incr("cache_requests_total", hits, cache=cache, result="hit")
+        self.incr("cache_requests_total", misses, cache=cache, result="miss")
+
+    def counters(self):
+        """
+        Returns {(name, label pairs): value} for every counter.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def gauges(self):
+        """
+        Returns {(name, label pairs): value} for every gauge.
+        """
+        with self._lock:
+            return dict(self._gauges)
+
+    def stage_summary(self):
+        """
+        Returns {stage: {"count", "total_s", "mean_ms"}} over all recorded spans.
+        """
+        with self._lock:
+            return {
+                stage: {"count": count, "total_s": total, "mean_ms": total / count * 1000}
+                for stage, (_, total, count) in self._histograms.items()
+            }
+
+    def last_trace(self):
+        """
+        Returns the spans of the most recently finished top-level span,
+        ordered by start time.
+        """
+        with self._lock:
+            spans = list(self._spans)
+        root = next((s for s in reversed(spans) if s["parent"] is None), None)
+        if root is None:
+            return []
+        return sorted((s for s in spans if s["trace"] == root["trace"]), key=lambda s: s["start"])
+
+    def prometheus_text(self):
+        """
+        Renders the histograms and counters in the Prometheus text exposition format.
+        """
+        with self._lock:
+            histograms = {stage: (list(b), total, count) for stage, (b, total, count) in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        metric = PREFIX + "stage_duration_seconds"
+        lines = [f"# HELP {metric} Latency of pipeline stages.", f"# TYPE {metric} histogram"]
+        for stage in sorted(histograms):
+            buckets, total, count = histograms[stage]
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{metric}_bucket{_labels([('stage', stage), ('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels([('stage', stage), ('le', '+Inf')])} {count}")
+            lines.append(f"{metric}_sum{_labels([('stage', stage)])} {total}")
+            lines.append(f"{metric}_count{_labels([('stage', stage)])} {count}")
+
+        for kind, metrics in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({name for name, _ in metrics}):
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                for (metric_name, labels), value in sorted(metrics.items()):
+                    if metric_name == name:
+                        lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def trace_events(self):
+        """
+        Returns the recorded spans as a Chrome trace-event document.
+        """
+        with self._lock:
+            spans = list(self._spans)
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": s["name"],
+                    "ph": "X",
+                    "ts": s["start"] * 1e6,
+                    "dur": s["duration"] * 1e6,
+                    "pid": pid,
+                    "tid": s["thread"],
+                    "args": dict(s["attributes"], span_id=s["id"], parent_id=s["parent"], trace_id=s["trace"]),
+                }
+                for s in spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def export(self, directory="./metrics"):
+        """
+        Writes `metrics.prom` and `trace.json` to `directory`.
+        Returns the two paths.
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        prom_path = os.path.join(directory, "metrics.prom")
+        trace_path = os.path.join(directory, "trace.json")
+        for path, write in (
+            (prom_path, lambda f: f.write(self.prometheus_text())),
+            (trace_path, lambda f: json.dump(self.trace_events(), f, default=str)),
+        ):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        return prom_path, trace_path
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+_telemetry = Telemetry(enabled=os.getenv("TELEMETRY_ENABLED", "1") != "0")
+
+if os.getenv("TELEMETRY_DIR"):
+    atexit.register(_telemetry.export, os.getenv("TELEMETRY_DIR"))
+
+def get_telemetry():
+    """
+    Returns the process-wide Telemetry instance.
+    """
+    return _telemetry
+
+def span(name, **attributes):
+    return _telemetry.span(name, **attributes)
+
+def incr(name, value=1, **labels):
+    _telemetry.incr(name, value, **labels)
+
+def set_gauge(name, value, **labels):
+    _telemetry.set_gauge(name, value, **labels)
+
+def cache_result(cache, hits, misses=0):
+    _telemetry.cache_result(cache, hits, misses)
+
+def traced(name, **attributes):
+    return _telemetry.traced(name, **attributes)
+
+def span_attributes():
+    """
+    Returns the attribute dict of the innermost open span, or a throwaway
+    dict when there is none (or telemetry is disabled).
+    """
+    current = _current_span.get()
+    return current["attributes"] if current else {}
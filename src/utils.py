@@ -1,40 +1,192 @@
-from fpdf import FPDF
+import hashlib
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+from fpdf import FPDF, FPDF_VERSION
+from telemetry import cache_result, span
+
+# fpdf 1.7 needs uni=True for TrueType fonts and returns output as a latin-1
+# str; fpdf2 embeds TrueType fonts as Unicode and returns bytes.
+LEGACY_FPDF = FPDF_VERSION.startswith("1.")
+
+# (regular, bold) TrueType fonts with wide Unicode coverage, tried in order.
+# PDF_FONT and PDF_BOLD_FONT override the search.
+UNICODE_FONTS = [
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/dejavu/DejaVuSans.ttf", "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/TTF/DejaVuSans.ttf", "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf"),
+    ("/System/Library/Fonts/Supplemental/Arial Unicode.ttf", None),
+    ("/Library/Fonts/Arial Unicode.ttf", None),
+    ("C:\\Windows\\Fonts\\arial.ttf", "C:\\Windows\\Fonts\\arialbd.ttf"),
+]
+
+HEADING_SIZES = {1: 18, 2: 15, 3: 13}
+BODY_SIZE = 11
+LINE_HEIGHT = 6
+LIST_INDENT = 6
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+BULLET_RE = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+NUMBERED_RE = re.compile(r"^(\s*)(\d+[.)])\s+(.*)$")
+BOLD_RE = re.compile(r"(\*\*|__)(.+?)\1")
+LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+
+def find_unicode_font():
+    """
+    Returns (regular path, bold path or None) for a Unicode TrueType font,
+    or None if none is installed.
+    """
+    candidates = UNICODE_FONTS
+    if os.getenv("PDF_FONT"):
+        candidates = [(os.getenv("PDF_FONT"), os.getenv("PDF_BOLD_FONT"))] + candidates
+    for regular, bold in candidates:
+        if os.path.exists(regular):
+            return regular, bold if bold and os.path.exists(bold) else None
+    return None
 
 class PDF(FPDF):
+    def __init__(self):
+        super().__init__()
+        self.family = "Helvetica"
+        self.has_bold = True
+        self.unicode = False
+        font = find_unicode_font()
+        if font:
+            regular, bold = font
+            extra = {"uni": True} if LEGACY_FPDF else {}
+            self.add_font("Unicode", "", regular, **extra)
+            if bold:
+                self.add_font("Unicode", "B", bold, **extra)
+            self.family = "Unicode"
+            self.has_bold = bold is not None
+            self.unicode = True
+        self.set_auto_page_break(True, margin=15)
+
+    def clean(self, text):
+        # Core fonts only cover latin-1; replace anything else.
+        return text if self.unicode else text.encode('latin-1', 'replace').decode('latin-1')
+
+    def use_font(self, size, bold=False):
+        self.set_font(self.family, 'B' if bold and self.has_bold else '', size)
+
     def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'CareerPathGPT - Roadmap', 0, 1, 'C')
-        self.ln(10)
+        self.use_font(12, bold=True)
+        self.cell(0, 10, 'CareerPathGPT - Roadmap', align='C')
+        self.ln(20)
 
     def footer(self):
         self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+        self.use_font(8)
+        self.cell(0, 10, f'Page {self.page_no()}', align='C')
 
-def create_pdf(text):
+def _strip_inline(text):
+    return LINK_RE.sub(r"\1", text).replace("`", "")
+
+def _write_runs(pdf, text, size, bold=False):
     """
-    Generates a PDF file from the given text.
-    Handles encoding issues by replacing unsupported characters.
-    Returns the binary content of the PDF.
+    Writes one block of text, switching to bold for **...** runs and
+    wrapping at the current left margin.
     """
-    pdf = PDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    
-    # Split text into lines to handle basic formatting
-    lines = text.split('\n')
+    position = 0
+    text = _strip_inline(text)
+    for match in BOLD_RE.finditer(text):
+        if match.start() > position:
+            pdf.use_font(size, bold)
+            pdf.write(LINE_HEIGHT, pdf.clean(text[position:match.start()]))
+        pdf.use_font(size, True)
+        pdf.write(LINE_HEIGHT, pdf.clean(match.group(2)))
+        position = match.end()
+    if position < len(text):
+        pdf.use_font(size, bold)
+        pdf.write(LINE_HEIGHT, pdf.clean(text[position:]))
+    pdf.ln(LINE_HEIGHT)
+
+def _write_list_item(pdf, marker, text, level):
+    margin = pdf.l_margin
+    indent = margin + LIST_INDENT * (level + 1)
+    pdf.use_font(BODY_SIZE)
+    marker_width = pdf.get_string_width(marker + " ") + 1
+    pdf.set_x(indent)
+    pdf.cell(marker_width, LINE_HEIGHT, marker)
+    # Wrapped lines of the item align with its first line, not the bullet.
+    pdf.set_left_margin(indent + marker_width)
+    _write_runs(pdf, text, BODY_SIZE)
+    pdf.set_left_margin(margin)
+
+def render_markdown(pdf, lines):
+    """
+    Renders Markdown lines onto `pdf` in a single pass: headings, bullet
+    and numbered lists (nested by indentation), rules, paragraphs and
+    **bold** runs.
+    """
+    bullet = "\u2022" if pdf.unicode else "-"
     for line in lines:
-        # robust encoding handling
-        clean_line = line.encode('latin-1', 'replace').decode('latin-1')
-        
-        # Handle bolding (simple heuristic for **text**)
-        if "**" in line:
-            pdf.set_font("Arial", 'B', 12)
-            clean_line = clean_line.replace("**", "")
-            pdf.multi_cell(0, 10, clean_line)
-            pdf.set_font("Arial", size=12)
-        else:
-            pdf.multi_cell(0, 10, clean_line)
-            
-    # Output to a temporary file and read bytes
-    return pdf.output(dest='S').encode('latin-1')
+        line = line.rstrip()
+        if not line.strip():
+            pdf.ln(LINE_HEIGHT / 2)
+            continue
+        heading = HEADING_RE.match(line)
+        if heading:
+            size = HEADING_SIZES.get(len(heading.group(1)), BODY_SIZE + 1)
+            pdf.ln(LINE_HEIGHT / 2)
+            _write_runs(pdf, heading.group(2).replace("**", ""), size, bold=True)
+            continue
+        if RULE_RE.match(line):
+            y = pdf.get_y() + LINE_HEIGHT / 2
+            pdf.line(pdf.l_margin, y, pdf.w - pdf.r_margin, y)
+            pdf.ln(LINE_HEIGHT)
+            continue
+        item = BULLET_RE.match(line)
+        if item:
+            _write_list_item(pdf, bullet, item.group(2), len(item.group(1).expandtabs(4)) // 2)
+            continue
+        item = NUMBERED_RE.match(line)
+        if item:
+            _write_list_item(pdf, item.group(2), item.group(3), len(item.group(1).expandtabs(4)) // 2)
+            continue
+        _write_runs(pdf, line.strip(), BODY_SIZE)
+
+def create_pdf(text):
+    """
+    Renders Markdown text (a roadmap) to PDF and returns the bytes.
+    Uses an installed Unicode TrueType font when available (see
+    find_unicode_font), else a core font with unsupported characters replaced.
+    """
+    with span("pdf_render", characters=len(text)) as attrs:
+        pdf = PDF()
+        pdf.add_page()
+        # Iterating a StringIO yields lines lazily instead of copying them all with split().
+        render_markdown(pdf, io.StringIO(text))
+        attrs["pages"] = pdf.page_no()
+        if LEGACY_FPDF:
+            return pdf.output(dest='S').encode('latin-1')
+        return bytes(pdf.output())
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+PDF_CACHE_SIZE = 32
+
+def roadmap_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def create_pdf_cached(text):
+    """
+    `create_pdf` memoized by the SHA-256 of `text`, keeping the
+    PDF_CACHE_SIZE most recently used PDFs in memory.
+    """
+    key = roadmap_hash(text)
+    with _pdf_cache_lock:
+        pdf_bytes = _pdf_cache.get(key)
+        if pdf_bytes is not None:
+            _pdf_cache.move_to_end(key)
+    cache_result("pdf", pdf_bytes is not None, pdf_bytes is None)
+    if pdf_bytes is None:
+        pdf_bytes = create_pdf(text)
+        with _pdf_cache_lock:
+            _pdf_cache[key] = pdf_bytes
+            while len(_pdf_cache) > PDF_CACHE_SIZE:
+                _pdf_cache.popitem(last=False)
+    return pdf_bytes
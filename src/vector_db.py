@@ -1,20 +1,54 @@
-import chromadb
-from chromadb.config import Settings
 import os
+from telemetry import traced
+
+def split_results(results, count):
+    """
+    Splits a batched Chroma result into `count` single-query results.
+    """
+    per_query = {"ids", "documents", "metadatas", "distances", "embeddings", "uris", "data"}
+    return [
+        {key: [value[i]] if key in per_query and value is not None else value
+         for key, value in results.items()}
+        for i in range(count)
+    ]
+
+def _chroma_where(where):
+    """
+    Converts a flat equality filter into Chroma's syntax, which needs
+    an explicit $and for more than one field.
+    """
+    if len(where) <= 1:
+        return where
+    return {"$and": [{key: value} for key, value in where.items()]}
 
 class VectorDB:
-    def __init__(self, collection_name="career_path_gpt", persist_directory="./chroma_db"):
+    def __init__(self, collection_name="career_path_gpt", persist_directory="./chroma_db", read_only=False):
         """
         Initializes the ChromaDB client and collection.
+        With `read_only` the collection must already exist and writes
+        raise PermissionError, so serving processes cannot modify it.
         """
         # Ensure persist directory exists
-        if not os.path.exists(persist_directory):
+        if not read_only and not os.path.exists(persist_directory):
             os.makedirs(persist_directory)
-            
+
+        # chromadb takes seconds to import; only pay for it when this backend is used.
+        import chromadb
         self.client = chromadb.PersistentClient(path=persist_directory)
         
-        self.collection = self.client.get_or_create_collection(name=collection_name)
-        print(f"Connected to ChromaDB collection: {collection_name}")
+        self.read_only = read_only
+        if read_only:
+            self.collection = self.client.get_collection(name=collection_name)
+        else:
+            self.collection = self.client.get_or_create_collection(name=collection_name)
+        # Keyword and skill indexes kept in sync by ingest_data.
+        self.bm25_path = os.path.join(persist_directory, f"{collection_name}.bm25.json")
+        self.skill_index_path = os.path.join(persist_directory, f"{collection_name}.skills.npz")
+        print(f"Connected to ChromaDB collection: {collection_name}" + (" (read-only)" if read_only else ""))
+
+    def _check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"Collection {self.collection.name} is opened read-only.")
 
     def add_documents(self, documents, metadatas, ids):
         """
@@ -26,6 +60,7 @@ class VectorDB:
         Actually, to be consistent with our architecture, we should probably pass embeddings 
         generated by our EmbeddingEngine. But Chroma's add method takes embeddings as an optional arg.
         """
+        self._check_writable()
         self.collection.add(
             documents=documents,
             metadatas=metadatas,
@@ -37,6 +72,7 @@ class VectorDB:
         """
         Adds documents with pre-computed embeddings.
         """
+        self._check_writable()
         self.collection.add(
             documents=documents,
             embeddings=embeddings,
@@ -45,6 +81,43 @@ class VectorDB:
         )
         print(f"Added {len(documents)} documents with embeddings to the collection.")
 
+    @traced("vector_upsert")
+    def upsert_documents_with_embeddings(self, documents, embeddings, metadatas, ids):
+        """
+        Inserts or replaces documents with pre-computed embeddings.
+        """
+        self._check_writable()
+        self.collection.upsert(
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=ids
+        )
+        print(f"Upserted {len(documents)} documents with embeddings to the collection.")
+
+    def get_ids(self, page_size=5000):
+        """
+        Returns the set of all document ids in the collection.
+        """
+        ids = set()
+        offset = 0
+        while True:
+            page = self.collection.get(include=[], limit=page_size, offset=offset)
+            ids.update(page["ids"])
+            if len(page["ids"]) < page_size:
+                return ids
+            offset += page_size
+
+    @traced("vector_delete")
+    def delete(self, ids):
+        """
+        Deletes documents by id.
+        """
+        self._check_writable()
+        if ids:
+            self.collection.delete(ids=ids)
+            print(f"Deleted {len(ids)} documents from the collection.")
+
     def query(self, query_text, n_results=5):
         """
         Queries the collection using text (Chroma computes embedding).
@@ -55,15 +128,54 @@ class VectorDB:
         )
         return results
 
-    def query_by_embedding(self, query_embedding, n_results=5):
+    def query_by_embedding(self, query_embedding, n_results=5, where=None):
         """
         Queries the collection using a pre-computed embedding.
+        `where` filters on metadata equality, e.g. {"category": "Data"}.
+        """
+        return self.query_by_embeddings([query_embedding], n_results=n_results, where=where)[0]
+
+    @traced("vector_query")
+    def query_by_embeddings(self, query_embeddings, n_results=5, where=None):
+        """
+        Queries the collection with several embeddings in one call.
+        Returns one Chroma-shaped result per query.
         """
+        kwargs = {"where": _chroma_where(where)} if where else {}
         results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            **kwargs
         )
-        return results
+        return split_results(results, len(query_embeddings))
+
+    @traced("vector_get")
+    def get_by_ids(self, ids):
+        """
+        Returns documents and metadatas for `ids`, in the order given.
+        Unknown ids are skipped.
+        """
+        found = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        rows = {i: (d, m) for i, d, m in zip(found["ids"], found["documents"], found["metadatas"])}
+        ordered = [i for i in ids if i in rows]
+        return {
+            "ids": ordered,
+            "documents": [rows[i][0] for i in ordered],
+            "metadatas": [rows[i][1] for i in ordered],
+        }
+
+def create_vector_db(backend=None, **kwargs):
+    """
+    Builds the vector store named by `backend` or the VECTOR_DB_BACKEND
+    environment variable: "chroma" (default) or "numpy".
+    """
+    backend = backend or os.getenv("VECTOR_DB_BACKEND", "chroma")
+    if backend == "chroma":
+        return VectorDB(**kwargs)
+    if backend == "numpy":
+        from numpy_vector_db import NumpyVectorDB
+        return NumpyVectorDB(**kwargs)
+    raise ValueError(f"Unknown vector DB backend: {backend}")
 
 if __name__ == "__main__":
     # Test the VectorDB
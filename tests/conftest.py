@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules in src import each other by bare name, as the app and scripts do.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
@@ -0,0 +1,34 @@
+import pytest
+
+from career_matcher import CareerMatcher, build_skill_index
+from embedding_engine import EmbeddingEngine
+from fake_gemini import FakeEmbedder
+
+CAREERS = [
+    ("Data Engineer", "Data", "Builds pipelines with Python, SQL and Docker on AWS."),
+    ("Frontend Developer", "Web", "Builds interfaces with JavaScript, React and CSS."),
+    ("Technical Writer", "Content", "Writes documentation for developers."),
+]
+
+@pytest.fixture
+def matcher(tmp_path):
+    embedder = FakeEmbedder(latency=0.0, dim=32)
+    engine = EmbeddingEngine(backend="gemini", embed_fn=embedder.embed_content, use_cache=False)
+    path = str(tmp_path / "skills.npz")
+    build_skill_index(CAREERS, engine, path)
+    return CareerMatcher(engine, path)
+
+def test_match_ranks_careers_by_skill_coverage(matcher):
+    matches = matcher.match(["python", "SQL", "docker"], top_n=3)
+    best = matches[0]
+    assert best["role"] == "Data Engineer" and best["category"] == "Data"
+    # Canonical names match exactly whatever their case.
+    assert set(best["matched_skills"]) == {"Python", "SQL", "Docker"}
+    assert best["missing_skills"] == ["AWS"]
+    assert best["score"] > matches[1]["score"]
+    # A career with no dictionary skills scores 0 rather than failing.
+    assert [m for m in matches if m["role"] == "Technical Writer"][0]["score"] == 0.0
+
+def test_match_without_skills_returns_nothing(matcher):
+    assert matcher.match([]) == []
+    assert matcher.match(["  "]) == []
@@ -0,0 +1,62 @@
+import pytest
+
+from context_builder import estimate_tokens
+from conversation_store import Conversation, ConversationStore, llm_summarizer
+
+@pytest.fixture
+def store(tmp_path):
+    return ConversationStore(str(tmp_path / "conversations.sqlite3"))
+
+def message(i):
+    return f"Message {i}. " + "Some detail about data engineering careers. " * 5
+
+def test_context_stays_bounded(store):
+    conversation = Conversation(store, "s1", window_tokens=120, summary_tokens=60)
+    for i in range(30):
+        conversation.add("user" if i % 2 == 0 else "assistant", message(i))
+    context = conversation.context()
+    assert context.startswith("Summary of earlier conversation:")
+    assert "Message 29" in context
+    assert estimate_tokens(context) <= 120 + 60 + 20
+    assert conversation.count() == 30
+
+def test_context_is_bounded_before_rolling(store):
+    conversation = Conversation(store, "s1", window_tokens=120, summary_tokens=60)
+    for i in range(30):
+        conversation.add("user", message(i), roll=False)
+    assert store.get_summary("s1") == ("", 0)
+    context = conversation.context()
+    assert "Message 29" in context and "Message 0." not in context
+    assert estimate_tokens(context) <= 120 + 20
+
+    conversation.roll_in_background().join()
+    summary, through_id = store.get_summary("s1")
+    assert summary and through_id > 0
+
+def test_history_persists_across_store_instances(tmp_path):
+    path = str(tmp_path / "conversations.sqlite3")
+    Conversation(ConversationStore(path), "s1").add("user", "I want to move into data engineering.")
+    conversation = Conversation(ConversationStore(path), "s1")
+    assert [m["content"] for m in conversation.messages()] == ["I want to move into data engineering."]
+    assert "User: I want to move into data engineering." in conversation.context()
+
+def test_concurrent_rolls_apply_once(store):
+    conversation = Conversation(store, "s1", window_tokens=40)
+    for i in range(4):
+        conversation.add("user", message(i), roll=False)
+    _, through_id, _ = conversation._window()
+    assert store.set_summary("s1", "first", 3, previous_id=through_id)
+    assert not store.set_summary("s1", "second", 3, previous_id=through_id)
+    assert store.get_summary("s1") == ("first", 3)
+
+class FailingLLM:
+    def generate(self, prompt):
+        raise RuntimeError("503 unavailable")
+
+def test_summary_falls_back_to_extractive(store):
+    conversation = Conversation(store, "s1", summarize_fn=llm_summarizer(FailingLLM()),
+                                window_tokens=60, summary_tokens=60)
+    for i in range(6):
+        conversation.add("user", message(i))
+    summary, _ = store.get_summary("s1")
+    assert summary.startswith("User: Message 0")
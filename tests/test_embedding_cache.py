@@ -0,0 +1,20 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+def test_round_trips_vectors_through_memory_and_disk(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path, memory_size=1)
+    key = EmbeddingCache.make_key("model", "doc", "  Data   engineer ")
+    assert key == EmbeddingCache.make_key("model", "doc", "Data engineer")
+
+    cache.set_many([(key, [0.5, 1.0]), ("other", [1.0, 0.0])])
+    np.testing.assert_array_equal(cache.get(key), [0.5, 1.0])  # from SQLite: memory holds only "other"
+    np.testing.assert_array_equal(cache.get(key), [0.5, 1.0])  # from memory
+    assert cache.get_many([key, "missing"]).keys() == {key}
+    assert cache.stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75, "memory_entries": 1}
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    assert reopened.get(key).dtype == np.float32
+    assert reopened._entries == 2
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from embedding_engine import EmbeddingEngine
+from fake_gemini import FakeAPIError, FakeEmbedder
+
+class RecordingEmbedder(FakeEmbedder):
+    """
+    Records each request's size and the peak number of requests in flight,
+    and fails the first request for any text in `fail_once`.
+    """
+    def __init__(self, fail_once=()):
+        super().__init__(latency=0.02, dim=8)
+        self.fail_once = set(fail_once)
+        self.chunk_sizes = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed_content(self, model, content, task_type=None, title=None):
+        with self._lock:
+            self.chunk_sizes.append(len(content))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            failed = self.fail_once & set(content)
+            self.fail_once -= failed
+        try:
+            time.sleep(self.latency)
+            if failed:
+                raise FakeAPIError("503 unavailable (fake)")
+            return self._result(content)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+def make_engine(embedder, **kwargs):
+    return EmbeddingEngine(backend="gemini", embed_fn=embedder.embed_content, use_cache=False,
+                           retry_backoff=0.01, **kwargs)
+
+def test_batches_are_chunked_with_bounded_concurrency_and_keep_order():
+    texts = [f"career {i}" for i in range(25)]
+    embedder = RecordingEmbedder()
+    engine = make_engine(embedder, batch_size=4, max_concurrency=3)
+
+    embeddings = engine.generate_embeddings_batch(texts)
+
+    assert sorted(embedder.chunk_sizes) == [1] + [4] * 6
+    assert embedder.peak == 3
+    # Chunks finish in any order; results still line up with the input.
+    assert embeddings == embedder._result(texts)["embedding"]
+
+def test_failed_chunk_is_retried_alone():
+    texts = [f"career {i}" for i in range(10)]
+    embedder = RecordingEmbedder(fail_once={"career 5"})
+    engine = make_engine(embedder, batch_size=4, max_concurrency=2)
+
+    embeddings = engine.generate_embeddings_batch(texts)
+
+    # Three chunks plus one retry of the chunk holding "career 5" (texts 4-7).
+    assert sorted(embedder.chunk_sizes) == [2, 4, 4, 4]
+    assert embeddings == embedder._result(texts)["embedding"]
+
+def test_chunk_failing_every_attempt_raises():
+    embedder = RecordingEmbedder(fail_once={"career 0"})
+    engine = make_engine(embedder, batch_size=4, max_retries=0)
+    with pytest.raises(FakeAPIError):
+        engine.generate_embeddings_batch(["career 0", "career 1"])
+    assert embedder.chunk_sizes == [2]
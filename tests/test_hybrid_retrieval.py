@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from bm25_index import BM25Index, tokenize
+from numpy_vector_db import NumpyVectorDB
+from rag_pipeline import RAGPipeline, RRF_K
+
+def test_tokenize_splits_compounds_but_keeps_tech_names():
+    assert tokenize("Django/Flask on AWS/Azure with machine-learning") == [
+        "django", "flask", "aws", "azure", "machine", "learning"
+    ]
+    assert tokenize("C++, C#, Node.js and CI/CD.") == ["c++", "c#", "node.js", "ci/cd"]
+
+def test_bm25_search_ranks_and_filters(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.json"))
+    index.upsert(
+        ["web", "data", "ml"],
+        ["Build APIs with Django/Flask", "Data pipelines on AWS/Azure", "Machine-learning models on AWS"],
+        [{"category": "Web"}, {"category": "Data"}, {"category": "AI"}],
+    )
+    assert [doc_id for doc_id, _ in index.search("django")] == ["web"]
+    assert {doc_id for doc_id, _ in index.search("aws")} == {"data", "ml"}
+    assert [doc_id for doc_id, _ in index.search("aws", where={"category": "AI"})] == ["ml"]
+    assert index.search("machine learning")[0][0] == "ml"
+
+def test_bm25_index_from_older_tokenizer_starts_empty(tmp_path):
+    path = tmp_path / "bm25.json"
+    path.write_text(json.dumps({"docs": {"x": {"len": 1, "tf": {"django/flask": 1}, "meta": {}}}}))
+    assert len(BM25Index(str(path))) == 0
+
+    index = BM25Index(str(path))
+    index.upsert(["x"], ["Django/Flask"])
+    index.save()
+    assert BM25Index(str(path)).search("flask")[0][0] == "x"
+
+@pytest.fixture
+def rag(tmp_path):
+    db = NumpyVectorDB(persist_directory=str(tmp_path))
+    db.upsert_documents_with_embeddings(
+        ["doc a", "doc b", "doc c", "doc d"], [[1, 0], [0, 1], [1, 1], [1, -1]],
+        [{"role": r} for r in "abcd"], ["a", "b", "c", "d"]
+    )
+    return RAGPipeline(vector_db=db, embedding_engine=object(), model=object(),
+                       use_semantic_cache=False, retrieval_mode="vector")
+
+def test_fuse_combines_ranks_and_fetches_keyword_only_hits(rag):
+    vector = {"ids": [["a", "b", "c"]], "documents": [["doc a", "doc b", "doc c"]],
+              "metadatas": [[{"role": "a"}, {"role": "b"}, {"role": "c"}]]}
+    keyword = [("c", 7.0), ("d", 3.0)]
+
+    fused = rag._fuse(vector, keyword, n_results=4)
+
+    # c is found by both searches; b and d tie on rank 2 and keep first-seen order.
+    assert fused["ids"][0] == ["c", "a", "b", "d"]
+    assert fused["documents"][0] == ["doc c", "doc a", "doc b", "doc d"]
+    assert fused["scores"][0][0] == pytest.approx(1 / (RRF_K + 3) + 1 / (RRF_K + 1))
+    assert fused["distances"][0] == [0.0, 1.0, 2.0, 3.0]
+    assert rag._fuse(vector, keyword, n_results=2)["ids"][0] == ["c", "a"]
@@ -0,0 +1,115 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from bm25_index import BM25Index
+from career_matcher import load_skill_index
+from embedding_engine import EmbeddingEngine
+from fake_gemini import FakeEmbedder
+from ingest_data import ingest_careers, record_id
+from numpy_vector_db import NumpyVectorDB
+
+CAREERS = [
+    {"role": "Data Engineer", "category": "Data", "description": "Builds pipelines with Python and SQL."},
+    {"role": "Web Developer", "category": "Web", "description": "Builds sites with React and Django."},
+    {"role": "Nurse", "category": "Health", "description": "Provides patient care."},
+]
+
+class CountingEmbedder(FakeEmbedder):
+    def __init__(self):
+        super().__init__(latency=0.0, dim=8)
+        self.embedded = []
+
+    def embed_content(self, model, content, task_type=None, title=None):
+        self.embedded.extend(content if isinstance(content, list) else [content])
+        return super().embed_content(model, content, task_type, title)
+
+def write_catalog(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+@pytest.fixture
+def setup(tmp_path):
+    embedder = CountingEmbedder()
+    engine = EmbeddingEngine(backend="gemini", embed_fn=embedder.embed_content, use_cache=False)
+    db = NumpyVectorDB(persist_directory=str(tmp_path / "db"))
+    return tmp_path / "careers.jsonl", db, engine, embedder
+
+def test_first_ingest_embeds_everything(setup):
+    path, db, engine, embedder = setup
+    stats = ingest_careers(write_catalog(path, CAREERS), db=db, engine=engine)
+    assert stats == {"unchanged": 0, "upserted": 3, "deleted": 0, "skipped": 0}
+    assert db.get_ids() == {record_id(r, engine.model_name) for r in CAREERS}
+    assert len(BM25Index(db.bm25_path)) == 3
+
+def test_rerun_is_a_no_op(setup):
+    path, db, engine, embedder = setup
+    ingest_careers(write_catalog(path, CAREERS), db=db, engine=engine)
+    embedder.embedded.clear()
+    stats = ingest_careers(str(path), db=db, engine=engine)
+    assert stats == {"unchanged": 3, "upserted": 0, "deleted": 0, "skipped": 0}
+    assert embedder.embedded == []
+
+def test_changes_are_diffed(setup):
+    path, db, engine, embedder = setup
+    ingest_careers(write_catalog(path, CAREERS), db=db, engine=engine)
+    embedder.embedded.clear()
+
+    edited = dict(CAREERS[0], description="Builds streaming pipelines with Kafka.")
+    added = {"role": "Chef", "category": "Hospitality", "description": "Runs a kitchen."}
+    records = [edited, CAREERS[1], added, {"role": "", "description": "missing role"}]
+    stats = ingest_careers(write_catalog(path, records), db=db, engine=engine)
+
+    assert stats == {"unchanged": 1, "upserted": 2, "deleted": 2, "skipped": 1}
+    # Only new and edited descriptions are embedded (the rest are skill names for the skill index).
+    descriptions = {r["description"] for r in CAREERS + records}
+    assert sorted(t for t in embedder.embedded if t in descriptions) == sorted([edited["description"], added["description"]])
+    expected = {record_id(r, engine.model_name) for r in (edited, CAREERS[1], added)}
+    assert db.get_ids() == expected
+    bm25 = BM25Index(db.bm25_path)
+    assert len(bm25) == 3
+    assert bm25.search("kafka")[0][0] == record_id(edited, engine.model_name)
+    assert bm25.search("patient") == []
+
+def skill_index(db):
+    index = load_skill_index(db.skill_index_path)
+    counts = np.diff(index["offsets"])
+    names = index["skill_names"]
+    skills = {}
+    for i, career_id in enumerate(index["ids"]):
+        start = index["offsets"][i]
+        skills[career_id] = {names[j] for j in index["indices"][start:start + counts[i]]}
+    return skills
+
+def test_skill_index_is_updated_per_record(setup):
+    path, db, engine, embedder = setup
+    ingest_careers(write_catalog(path, CAREERS), db=db, engine=engine)
+    assert skill_index(db)[record_id(CAREERS[0], engine.model_name)] == {"Python", "SQL"}
+    embedder.embedded.clear()
+    saved = os.path.getmtime(db.skill_index_path)
+
+    ingest_careers(str(path), db=db, engine=engine)
+    assert os.path.getmtime(db.skill_index_path) == saved
+
+    edited = dict(CAREERS[0], description="Builds streaming pipelines with Kafka and Python.")
+    ingest_careers(write_catalog(path, [edited, CAREERS[1]]), db=db, engine=engine)
+    # Only the skill the index did not have yet is embedded.
+    assert [t for t in embedder.embedded if t != edited["description"]] == ["Kafka"]
+    skills = skill_index(db)
+    assert skills == {
+        record_id(edited, engine.model_name): {"Kafka", "Python"},
+        record_id(CAREERS[1], engine.model_name): {"React", "Django"},
+    }
+    # SQL is no longer used by any career and is pruned.
+    assert "SQL" not in load_skill_index(db.skill_index_path)["skill_names"]
+
+def test_missing_skill_index_is_rebuilt_from_the_store(setup):
+    path, db, engine, embedder = setup
+    ingest_careers(write_catalog(path, CAREERS), db=db, engine=engine)
+    os.remove(db.skill_index_path)
+    ingest_careers(str(path), db=db, engine=engine)
+    assert set(skill_index(db)) == db.get_ids()
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fake_gemini import FakeAPIError, FakeGenerativeModel
+from llm_client import LLMClient, RateLimiter
+
+class CountingModel(FakeGenerativeModel):
+    def __init__(self, errors=(), **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.errors = list(errors)
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        if self.errors:
+            time.sleep(self.latency)
+            raise self.errors.pop(0)
+        return super().generate_content(prompt, stream)
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        return await super().generate_content_async(prompt)
+
+def test_rate_limiter_waits_for_an_empty_bucket():
+    limiter = RateLimiter(rpm=60)
+    for _ in range(60):
+        assert limiter.reserve(1) == 0
+    # One request per second refills the bucket.
+    assert limiter.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+def test_rate_limiter_caps_oversized_prompts_at_a_full_bucket():
+    limiter = RateLimiter(tpm=600)
+    assert limiter.reserve(600) == 0
+    # 10 tokens per second: a prompt over the whole budget waits for a full bucket.
+    assert limiter.reserve(10_000) == pytest.approx(60.0, abs=0.5)
+
+def test_generate_coalesces_identical_prompts():
+    model = CountingModel(latency=0.1)
+    client = LLMClient(model)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.generate("same"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [model.reply] * 5
+    assert model.calls == 1
+
+def test_agenerate_coalesces_identical_prompts():
+    model = CountingModel(latency=0.05)
+    client = LLMClient(model)
+
+    async def main():
+        return await asyncio.gather(*(client.agenerate("same") for _ in range(5)))
+
+    assert asyncio.run(main()) == [model.reply] * 5
+    assert model.calls == 1
+
+def test_agenerate_leader_cancellation_does_not_cancel_followers():
+    model = CountingModel(latency=0.1)
+    client = LLMClient(model)
+
+    async def main():
+        leader = asyncio.ensure_future(client.agenerate("same"))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(client.agenerate("same"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(main()) == (model.reply, True)
+    assert model.calls == 1
+
+def test_generate_retries_transient_errors():
+    model = CountingModel(latency=0.0, errors=[FakeAPIError("429 quota"), FakeAPIError("503 unavailable")])
+    client = LLMClient(model, retry_backoff=0.01)
+    assert client.generate("retry me") == model.reply
+    assert model.calls == 3
+
+def test_generate_does_not_retry_client_errors():
+    model = CountingModel(latency=0.0, errors=[FakeAPIError("400 bad request")])
+    client = LLMClient(model, retry_backoff=0.01)
+    with pytest.raises(FakeAPIError):
+        client.generate("bad")
+    assert model.calls == 1
@@ -0,0 +1,76 @@
+import pytest
+
+from numpy_vector_db import NumpyVectorDB
+
+def vector(*values):
+    return list(values) + [0.0] * (4 - len(values))
+
+@pytest.fixture
+def db(tmp_path):
+    return NumpyVectorDB(persist_directory=str(tmp_path))
+
+def test_upsert_and_delete_outside_bulk_write(db):
+    db.upsert_documents_with_embeddings(["a", "b"], [vector(1), vector(0, 1)], [{}, {}], ["1", "2"])
+    assert db.get_ids() == {"1", "2"}
+    db.delete(["1"])
+    assert db.get_ids() == {"2"}
+
+def test_query_orders_by_similarity(db):
+    db.upsert_documents_with_embeddings(
+        ["x", "y", "z"], [vector(1), vector(0, 1), vector(1, 1)],
+        [{"category": "A"}, {"category": "B"}, {"category": "A"}], ["x", "y", "z"]
+    )
+    assert db.query_by_embedding(vector(1, 0.1), n_results=3)["ids"][0] == ["x", "z", "y"]
+    assert db.query_by_embedding(vector(0, 1), n_results=3, where={"category": "A"})["ids"][0] == ["z", "x"]
+
+def test_bulk_write_persists_on_exit(tmp_path, db):
+    with db.bulk_write():
+        db.upsert_documents_with_embeddings(["a"], [vector(1)], [{}], ["1"])
+        db.upsert_documents_with_embeddings(["b"], [vector(0, 1)], [{}], ["2"])
+        db.delete(["1"])
+        # Queries inside the block see the index as it was before it.
+        assert db.get_ids() == set()
+    assert db.get_ids() == {"2"}
+    assert NumpyVectorDB(persist_directory=str(tmp_path)).get_ids() == {"2"}
+
+def test_bulk_write_propagates_errors_and_writes_nothing(tmp_path, db):
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        with db.bulk_write():
+            db.upsert_documents_with_embeddings(["a"], [vector(1)], [{}], ["1"])
+            raise RuntimeError("embedding failed")
+    assert db.get_ids() == set()
+    assert NumpyVectorDB(persist_directory=str(tmp_path)).get_ids() == set()
+    # The failed block does not leave writes deferred.
+    db.upsert_documents_with_embeddings(["b"], [vector(0, 1)], [{}], ["2"])
+    assert NumpyVectorDB(persist_directory=str(tmp_path)).get_ids() == {"2"}
+
+def test_read_only_rejects_writes(tmp_path, db):
+    db.upsert_documents_with_embeddings(["a"], [vector(1)], [{}], ["1"])
+    reader = NumpyVectorDB(persist_directory=str(tmp_path), read_only=True)
+    assert reader.get_ids() == {"1"}
+    with pytest.raises(PermissionError):
+        reader.delete(["1"])
+
+def test_has_no_text_query_methods(db):
+    # Without an embedding function these would only fail mid-request.
+    assert not hasattr(db, "query")
+    assert not hasattr(db, "add_documents")
+
+def test_queries_during_writes_see_consistent_rows(db):
+    import threading
+    db.upsert_documents_with_embeddings(["doc-0"], [vector(1)], [{}], ["0"])
+    stop = threading.Event()
+
+    def write():
+        for i in range(1, 60):
+            db.upsert_documents_with_embeddings([f"doc-{i}"], [vector(1, i)], [{}], [str(i)])
+        stop.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not stop.is_set():
+        result = db.query_by_embedding(vector(1), n_results=5)
+        for doc_id, document in zip(result["ids"][0], result["documents"][0]):
+            assert document == f"doc-{doc_id}"
+    writer.join()
+    assert len(db.get_ids()) == 60
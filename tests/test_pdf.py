@@ -0,0 +1,44 @@
+import fitz
+
+import utils
+from utils import create_pdf, create_pdf_cached
+
+ROADMAP = """# Roadmap to Data Engineer
+
+## Phase 1: Foundations
+- Learn **SQL** joins and window functions
+  - Practise on [public datasets](https://example.com)
+1. Build a `pandas` project
+
+---
+Stay curious — résumé ready in 3–6 months ✓
+"""
+
+def pdf_text(pdf_bytes):
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as document:
+        return "".join(page.get_text() for page in document)
+
+def test_create_pdf_renders_markdown_without_markup():
+    pdf_bytes = create_pdf(ROADMAP)
+    assert pdf_bytes.startswith(b"%PDF")
+    text = pdf_text(pdf_bytes)
+    assert "Roadmap to Data Engineer" in text
+    assert "Learn SQL joins and window functions" in " ".join(text.split())
+    assert "public datasets" in text and "example.com" not in text
+    for markup in ("#", "**", "`", "]("):
+        assert markup not in text
+
+def test_create_pdf_handles_long_and_non_latin_text():
+    text = pdf_text(create_pdf(ROADMAP * 40))
+    assert "Page 2" in text
+    assert "résumé" in text
+
+def test_create_pdf_falls_back_to_a_core_font(monkeypatch):
+    monkeypatch.setattr(utils, "find_unicode_font", lambda: None)
+    text = pdf_text(create_pdf(ROADMAP))
+    # Core fonts cover latin-1; characters outside it are replaced.
+    assert "résumé" in text and "?" in text
+
+def test_create_pdf_cached_reuses_rendered_bytes():
+    assert create_pdf_cached(ROADMAP) is create_pdf_cached(ROADMAP)
+    assert create_pdf_cached(ROADMAP) is not create_pdf_cached(ROADMAP + "\nMore.")
@@ -0,0 +1,56 @@
+import asyncio
+
+from embedding_engine import EmbeddingEngine
+from fake_gemini import FakeAPIError, FakeEmbedder, FakeGenerativeModel, FakeResponse
+from numpy_vector_db import NumpyVectorDB
+from rag_pipeline import ErrorChunk, RAGPipeline
+from semantic_cache import SemanticCache
+
+def make_pipeline(tmp_path, model=None, **kwargs):
+    embedder = FakeEmbedder(latency=0.0, dim=8)
+    engine = EmbeddingEngine(backend="gemini", embed_fn=embedder.embed_content,
+                             aembed_fn=embedder.embed_content_async, use_cache=False)
+    documents = ["Data engineer building pipelines", "Frontend developer", "Security analyst"]
+    db = NumpyVectorDB(persist_directory=str(tmp_path))
+    db.upsert_documents_with_embeddings(documents, engine.generate_embeddings_batch(documents),
+                                        [{} for _ in documents], ["data", "web", "security"])
+    kwargs.setdefault("use_semantic_cache", False)
+    return RAGPipeline(vector_db=db, embedding_engine=engine, model=model or FakeGenerativeModel(latency=0.01),
+                       retrieval_mode="vector", **kwargs)
+
+def test_async_api_works_across_event_loops(tmp_path):
+    rag = make_pipeline(tmp_path, max_concurrency=1)
+
+    async def burst():
+        # More requests than max_concurrency, so some wait on the semaphore.
+        return await asyncio.gather(*(rag.aanswer(f"question {i}", n_results=2) for i in range(4)))
+
+    # Each asyncio.run() has its own loop, as with separate workers or test cases.
+    for _ in range(2):
+        results = asyncio.run(burst())
+        assert [r["answer"] for r in results] == ["This is a fake answer."] * 4
+
+class BrokenStreamModel(FakeGenerativeModel):
+    """
+    Streams one chunk, then fails; `fail` can be switched off to heal it.
+    """
+    fail = True
+
+    def _stream(self):
+        yield FakeResponse("Partial ")
+        if self.fail:
+            raise FakeAPIError("400 stream interrupted (fake)")
+        yield FakeResponse("answer.")
+
+def test_stream_failing_midway_is_not_cached(tmp_path):
+    model = BrokenStreamModel(latency=0.0)
+    rag = make_pipeline(tmp_path, model=model, semantic_cache=SemanticCache())
+
+    chunks = list(rag.answer_stream("Which career suits a data person?"))
+    assert chunks[0] == "Partial " and isinstance(chunks[-1], ErrorChunk)
+
+    model.fail = False
+    assert "".join(rag.answer_stream("Which career suits a data person?")) == "Partial answer."
+    # The complete answer is cached and served to the same query.
+    model.fail = True
+    assert "".join(rag.answer_stream("Which career suits a data person?")) == "Partial answer."
@@ -0,0 +1,51 @@
+import sys
+
+import pytest
+
+import resume_rules
+from resume_rules import extract_resume_fields, match_skills
+
+@pytest.fixture(autouse=True, params=["spacy", "regex"])
+def matcher_backend(request, monkeypatch):
+    # Run every test with spaCy's PhraseMatcher and with the regex fallback.
+    if request.param == "spacy":
+        pytest.importorskip("spacy")
+    else:
+        monkeypatch.setitem(sys.modules, "spacy", None)
+    monkeypatch.setattr(resume_rules, "_matchers", None)
+    return request.param
+
+NURSE = """Mary Smith
+mary.smith@example.com
+Summary
+Registered nurse who will go the extra mile and excel at patient care.
+Skills: Patient Care, Triage, Excel, Communication, IV Therapy
+Experience
+Staff Nurse at City Hospital (2018-2023)
+- Led a ward of 20 beds
+Charge Nurse, St Mary's, 2015 - 2018
+Education
+BSc Nursing, State University (2011-2015)
+"""
+
+def test_skills_section_items_are_kept_outside_the_dictionary():
+    fields = extract_resume_fields(NURSE)
+    assert fields["skills"] == ["Patient Care", "Triage", "Excel", "Communication", "IV Therapy"]
+    assert "skills" not in fields["partial"]
+
+def test_unparsed_experience_lines_mark_the_field_partial():
+    fields = extract_resume_fields(NURSE)
+    assert [e["company"] for e in fields["experience"]] == ["City Hospital"]
+    assert "experience" in fields["partial"]
+    assert "education" not in fields["partial"]
+
+def test_without_skills_section_skills_are_partial():
+    fields = extract_resume_fields("John Doe\nI built services in Python and Go with Docker.\n")
+    assert fields["skills"] == ["Python", "Docker"]
+    assert fields["partial"] == ["skills"]
+
+def test_ambiguous_skills_need_exact_case_and_are_skipped_in_free_text():
+    text = "I go hiking in spring. I know C++, C#, C and R."
+    assert match_skills(text, ambiguous=False) == ["C++", "C#"]
+    assert match_skills(text) == ["C++", "C#", "C", "R"]
+    assert match_skills("Backend services in Go. Reports in Excel.") == ["Go", "Excel"]
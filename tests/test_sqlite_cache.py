@@ -0,0 +1,41 @@
+import time
+
+from sqlite_cache import SQLiteCache
+
+def test_get_set_and_stats(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("a", {"roadmap": "text"})
+    assert cache.get("a") == {"roadmap": "text"}
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "b"]) == {"a": {"roadmap": "text"}}
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+
+def test_expired_rows_are_missing(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache._count() == 0
+
+def test_evicts_least_recently_used_rows(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    for i in range(10):
+        cache.set(str(i), i)
+    cache.get("0")
+    cache.set("3", 3)  # replacing a key does not grow the cache
+    assert cache._count() == cache._entries == 10
+
+    cache.set("new", 10)
+    # Over capacity: the least recently used rows go, down to 9.
+    assert cache._count() == cache._entries == 9
+    assert cache.get("0") == 0 and cache.get("3") == 3 and cache.get("new") == 10
+    assert cache.get("1") is None and cache.get("2") is None
+
+def test_row_count_survives_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path)
+    cache.set_many([("a", 1), ("b", 2)])
+    cache.delete("a")
+    assert cache._entries == 1
+    cache.close()
+    assert SQLiteCache(path)._entries == 1
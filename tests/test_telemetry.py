@@ -0,0 +1,52 @@
+from telemetry import Telemetry, _current_span
+
+def test_span_nests_and_restores_parent():
+    telemetry = Telemetry()
+    with telemetry.span("outer"):
+        with telemetry.span("inner", size=3) as attrs:
+            attrs["tokens"] = 7
+    assert _current_span.get() is None
+    inner, outer = telemetry.last_trace()[1], telemetry.last_trace()[0]
+    assert inner["parent"] == outer["id"]
+    assert inner["attributes"] == {"size": 3, "tokens": 7}
+
+def test_traced_generator_is_not_current_between_chunks():
+    telemetry = Telemetry()
+
+    @telemetry.traced("child")
+    def child():
+        pass
+
+    @telemetry.traced("stream", stream=True)
+    def stream():
+        child()
+        yield 1
+        yield 2
+
+    seen = []
+    with telemetry.span("request"):
+        request = _current_span.get()
+        for _ in stream():
+            # The caller's code between chunks still runs under its own span.
+            seen.append(_current_span.get() is request)
+    assert seen == [True, True]
+
+    spans = {s["name"]: s for s in telemetry.last_trace()}
+    assert spans["stream"]["parent"] == spans["request"]["id"]
+    assert spans["child"]["parent"] == spans["stream"]["id"]
+    assert spans["stream"]["attributes"] == {"stream": True}
+
+def test_traced_generator_closed_early_records_the_span():
+    telemetry = Telemetry()
+
+    @telemetry.traced("stream")
+    def stream():
+        yield 1
+        yield 2
+
+    chunks = stream()
+    next(chunks)
+    chunks.close()
+    (record,) = telemetry.last_trace()
+    assert record["attributes"]["error"] == "GeneratorExit"
+    assert _current_span.get() is None